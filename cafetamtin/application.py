@@ -29,18 +29,32 @@ from utils.webcam import Webcam
 from base.board import Board
 from base.physical_buttons import PhysicalButtons
 from base.leds import Leds
-from base.facial import Facial
+from base.facial import Facial, AffectWorker
+from base.model_registry import ModelRegistry
+from base.recognition_executor import RecognitionExecutor
 from utils.timer import Timer
+from utils.debug_writer import DebugWriter
 import logging
 
 class Application:
     
     def __init__(self):
-        self.camera_student = Webcam(int(os.getenv('INDEX_CAMERA_STUDENT')), angle_rotation=0)
-        self.camera_board = Webcam(int(os.getenv('INDEX_CAMERA_BOARD')), angle_rotation=270)
+        DebugWriter.configure()
+        buffer_size = int(os.getenv('CAMERA_BUFFER_SIZE', 8))
+        self.camera_student = Webcam(int(os.getenv('INDEX_CAMERA_STUDENT')), angle_rotation=0, buffer_size=buffer_size)
+        self.camera_board = Webcam(int(os.getenv('INDEX_CAMERA_BOARD')), angle_rotation=270, buffer_size=buffer_size)
+        self.camera_student.start()
+        self.camera_board.start()
         
+        self.recognition_executor = RecognitionExecutor(int(os.getenv('RECOGNITION_WORKERS', 1)))
+        self.recognition_executor.warm_up()
+
         self.facial = Facial(self)
+        self.affect_worker = AffectWorker(self.facial, int(os.getenv('AFFECT_QUEUE_SIZE', 8)), float(os.getenv('AFFECT_SAMPLING_RATE', 0)))
+        self.affect_worker.start()
         self.board = Board(self)
+        self.board.recognizer.warm_up()
+        logging.info(f'|ModelRegistry|STATS[{ModelRegistry.stats()}]')
         self.physical_buttons = PhysicalButtons()
         self.game = Game(self, False)
 
@@ -72,6 +86,12 @@ def main(argv):
 
     app = Application()
     app.game.loop()
+    app.affect_worker.stop()
+    logging.info(f'|AffectWorker|STATS[{app.affect_worker.stats()}]')
+    app.camera_student.stop()
+    app.camera_board.stop()
+    app.recognition_executor.shutdown()
+    logging.info(f'|DebugWriter|STATS[{DebugWriter.stats()}]')
 
 @db_session
 def create_user():
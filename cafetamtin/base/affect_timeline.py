@@ -0,0 +1,75 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import numpy as np
+from threading import Lock
+
+SAMPLE = np.dtype([('time', '<f4'), ('expression', 'i1'), ('valence', '<f2'), ('arousal', '<f2')])
+QUADRANTS = ('Q1', 'Q2', 'Q3', 'Q4', 'QN')
+
+class AffectTimeline:
+
+    def __init__(self, capacity = 256):
+        self.samples = np.zeros(capacity, dtype=SAMPLE)
+        self.size = 0
+        self.started = time.time()
+        self.lock = Lock()
+
+    def __len__(self):
+        return self.size
+
+    def append(self, expression, valence, arousal):
+        with self.lock:
+            if self.size == len(self.samples):
+                self.samples = np.resize(self.samples, len(self.samples) * 2)
+            self.samples[self.size] = (time.time() - self.started, expression, valence, arousal)
+            self.size += 1
+
+    def take(self):
+        with self.lock:
+            samples = self.samples[:self.size].copy()
+            self.size = 0
+            self.started = time.time()
+        return samples
+
+    @staticmethod
+    def aggregates(samples, expressions, quadrant):
+        valid = samples[samples['expression'] >= 0]
+        if len(valid) == 0:
+            return None
+
+        dominant = int(np.bincount(valid['expression']).argmax())
+        valence = float(valid['valence'].astype(np.float32).mean())
+        arousal = float(valid['arousal'].astype(np.float32).mean())
+        quads = [quadrant(expressions.get(int(s['expression'])), float(s['valence']), float(s['arousal'])) for s in valid]
+        histogram = {quad: quads.count(quad) for quad in QUADRANTS}
+        return {
+            'expression': expressions.get(dominant),
+            'valence': valence,
+            'arousal': arousal,
+            'quad': quadrant(expressions.get(dominant), valence, arousal),
+            'histogram': histogram
+        }
+
+    @staticmethod
+    def pack(samples):
+        return samples.tobytes()
+
+    @staticmethod
+    def unpack(data):
+        return np.frombuffer(data, dtype=SAMPLE)
@@ -15,17 +15,74 @@
 # You should have received a copy of the GNU General Public License
 # along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
+import cv2
+import time
 import pygame
 import logging
-from pony.orm import *
+import numpy as np
+from threading import Thread, Lock
+from concurrent.futures import Future
 
-from database.models import DBBoard
+from base.calibration_store import Calibration, CalibrationStore
 from base.recognizer import Recognizer
+from base.motion_gate import MotionGate
+from base.board_state import BoardState
+from base.board_events import BoardDiff
 from base.leds import Leds
 from utils import message_box
+from utils.debug_writer import DebugWriter
 
 from game import FONT_NAME
 
+BLOCK_VALUES = {f'block-0{i}': i for i in range(1, 10)}
+CORNER_BLOCKS = ('block-01', 'block-02', 'block-03', 'block-04')
+EMPTY_VOTE = 0.5
+
+class BoardTrackerThread(Thread):
+
+    def __init__(self, board, rate, frames):
+        Thread.__init__(self)
+        self.daemon = True
+        self.board = board
+        self.interval = 1 / rate
+        self.frames = frames
+        self.running = False
+        self.candidate = None
+        self.count = 0
+        self.read_time = None
+
+    def run(self):
+        self.running = True
+        while self.running:
+            st = time.time()
+            try:
+                self.track(self.board.read_board(draw_box=False), st)
+            except Exception:
+                logging.exception('|BoardTracker|Falha ao avaliar o tabuleiro')
+                DebugWriter.error()
+            time.sleep(max(self.interval - (time.time() - st), 0))
+
+    def track(self, state, read_time):
+        with self.board.stable_lock:
+            if not self.running:
+                return
+            self.read_time = read_time
+            if self.candidate is not None and np.array_equal(self.candidate.matrix, state.matrix):
+                self.count += 1
+            else:
+                self.candidate = state
+                self.count = 1
+
+            if self.count >= self.frames:
+                self.board.stable_state = self.candidate
+                self.board.stable_time = time.time()
+
+    def settled(self):
+        return self.candidate is not None and self.count >= self.frames
+
+    def stop(self):
+        self.running = False
 
 class Board:
 
@@ -45,84 +102,67 @@ class Board:
         self.block_width = 0
         self.block_height = 0
         self.configuration_mode = False
+        self.tracking_rate = float(os.getenv('BOARD_TRACKING_RATE', 0))
+        self.tracking_frames = int(os.getenv('BOARD_TRACKING_FRAMES', 3))
+        self.tracking_window = float(os.getenv('BOARD_TRACKING_WINDOW', 0.5))
+        self.voting_frames = int(os.getenv('BOARD_VOTING_FRAMES', 1))
+        self.tracker = None
+        self.evaluation = None
+        self.evaluation_context = None
+        self.evaluation_error = False
+        self.stable_state = None
+        self.stable_time = None
+        self.stable_lock = Lock()
         
         self.camera = self.app.camera_board
         self.recognizer = Recognizer(self)
         self.leds = Leds()
         
         self.matrix_centers_board = []
+        self.homography = None
+        self.cell_offset = (0, 0)
 
-        self.matrix_board = []
-        self.load_dbboard()
+        self.state = BoardState.empty(self.lines, self.columns)
+        self.load_calibration()
+        CalibrationStore.subscribe(self)
         self.configure()
         self.define_matrix_board()
 
-    @db_session
-    def load_dbboard(self):
-        board = DBBoard.select().order_by(desc(DBBoard.id)).first()
-        if board:
-            self.id = board.id
-            self.columns = board.columns
-            self.lines = board.lines
-            self.top_left = (board.top_left_x, board.top_left_y)
-            self.top_right = (board.top_right_x, board.top_right_y)
-            self.bottom_left = (board.bottom_left_x, board.bottom_left_y)
-            self.bottom_right = (board.bottom_right_x, board.bottom_right_y)
-            self.block_width = board.block_width
-            self.block_height = board.block_height
-            self.width = board.width
-            self.height = board.height
-            self.span_cols = board.span_cols
-            self.span_rows = board.span_rows
-    
-    @db_session
+    def load_calibration(self):
+        calibration = CalibrationStore.get()
+        if calibration is not None:
+            self.apply_calibration(calibration)
+
+    def apply_calibration(self, calibration):
+        self.id = calibration.id
+        self.columns = calibration.columns
+        self.lines = calibration.lines
+        self.top_left = (calibration.top_left_x, calibration.top_left_y)
+        self.top_right = (calibration.top_right_x, calibration.top_right_y)
+        self.bottom_left = (calibration.bottom_left_x, calibration.bottom_left_y)
+        self.bottom_right = (calibration.bottom_right_x, calibration.bottom_right_y)
+        self.block_width = calibration.block_width
+        self.block_height = calibration.block_height
+        self.width = calibration.width
+        self.height = calibration.height
+        self.span_cols = calibration.span_cols
+        self.span_rows = calibration.span_rows
+
+    def calibration_changed(self, calibration):
+        self.apply_calibration(calibration)
+        self.homography = None
+        self.matrix_centers_board = []
+        self.configure()
+
     def update_dbboard(self):
-        try:
-            DBBoard[self.id].set(
-                top_left_x = self.top_left[0],
-                top_left_y = self.top_left[1],
-                top_right_x = self.top_right[0],
-                top_right_y = self.top_right[1],
-                bottom_left_x = self.bottom_left[0],
-                bottom_left_y = self.bottom_left[1],
-                bottom_right_x = self.bottom_right[0],
-                bottom_right_y = self.bottom_right[1],
-                block_width = self.block_width,
-                block_height = self.block_height,
-                width = self.width,
-                height = self.height,
-                span_cols = self.span_cols,
-                span_rows = self.span_rows
+        self.id = CalibrationStore.save(Calibration.from_board(self), source=self)
 
-            )
-        except ObjectNotFound:
-            board = DBBoard(
-                top_left_x = self.top_left[0],
-                top_left_y = self.top_left[1],
-                top_right_x = self.top_right[0],
-                top_right_y = self.top_right[1],
-                bottom_left_x = self.bottom_left[0],
-                bottom_left_y = self.bottom_left[1],
-                bottom_right_x = self.bottom_right[0],
-                bottom_right_y = self.bottom_right[1],
-                block_width = self.block_width,
-                block_height = self.block_height,
-                width = self.width,
-                height = self.height,
-                span_cols = self.span_cols,
-                span_rows = self.span_rows,
-                lines = 7,
-                columns = 7
-            )
-            self.load_dbboard()
+    @property
+    def matrix_board(self):
+        return self.state.matrix
 
     def define_matrix_board(self):
-        self.matrix_board.clear()
-        for i in range(self.lines):
-            line = []
-            for j in range(self.columns):
-                line.append(0)
-            self.matrix_board.append(line)
+        self.state = BoardState.empty(self.lines, self.columns)
 
     def draw_matrix_board(self):
         message = '\n'
@@ -195,6 +235,88 @@ class Board:
             return True
         return False
 
+    def auto_calibrate(self, refine = True):
+        self.configuration_mode = True
+        try:
+            image = self.camera.take_picture(delay=10, process=False)
+            positions = self.recognizer.get_positions(self.camera.process_image(image), True)
+        finally:
+            self.configuration_mode = False
+
+        corners = self.corners_from_board(positions)
+        if corners is None:
+            corners = self.corners_from_blocks(positions)
+        if corners is None:
+            return False
+
+        if refine:
+            corners = self.refine_corners(image, corners)
+
+        blocks = [positions[key] for key in BLOCK_VALUES if key in positions]
+        if len(blocks) > 0:
+            block_width = np.mean([block['w'] for block in blocks])
+            block_height = np.mean([block['h'] for block in blocks])
+        else:
+            block_width, block_height = self.previous_block_size(corners)
+        if block_width <= 0 or block_height <= 0:
+            return False
+
+        top_left, top_right, bottom_left, bottom_right = [tuple(int(round(v)) for v in corner) for corner in corners]
+        self.top_left, self.top_right = top_left, top_right
+        self.bottom_left, self.bottom_right = bottom_left, bottom_right
+        self.width = round((top_right[0] - top_left[0] + bottom_right[0] - bottom_left[0]) / 2)
+        self.height = round((bottom_left[1] - top_left[1] + bottom_right[1] - top_right[1]) / 2)
+        self.block_width = round(block_width)
+        self.block_height = round(block_height)
+        self.span_cols = round((self.width - (self.block_width * self.columns))/(self.columns - 1))
+        self.span_rows = round((self.height - (self.block_height * self.lines))/(self.lines - 1))
+
+        self.configure()
+        self.update_dbboard()
+        logging.info(f'|Board|AUTO_CALIBRATION:CORNERS[{corners.tolist()}]:BLOCK[{self.block_width}x{self.block_height}]')
+        return True
+
+    def corners_from_board(self, positions):
+        board = positions.get('board')
+        if board is None:
+            return None
+        x, y, w, h = board['x'], board['y'], board['w'], board['h']
+        return np.float32([[x, y], [x + w, y], [x, y + h], [x + w, y + h]])
+
+    def corners_from_blocks(self, positions):
+        if not all(key in positions for key in CORNER_BLOCKS):
+            return None
+        top_left, bottom_left, top_right, bottom_right = [positions[key] for key in CORNER_BLOCKS]
+        return np.float32([
+            [top_left['x'], top_left['y']],
+            [top_right['x'] + top_right['w'], top_right['y']],
+            [bottom_left['x'], bottom_left['y'] + bottom_left['h']],
+            [bottom_right['x'] + bottom_right['w'], bottom_right['y'] + bottom_right['h']]
+        ])
+
+    def refine_corners(self, image, corners):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        refined = corners.reshape(-1, 1, 2).copy()
+        criteria = (cv2.TERM_CRITERIA_EPS + cv2.TERM_CRITERIA_MAX_ITER, 30, 0.01)
+        cv2.cornerSubPix(gray, refined, (5, 5), (-1, -1), criteria)
+        refined = refined.reshape(-1, 2)
+
+        limit = max(self.block_width or 0, self.block_height or 0, 10) / 2
+        moved = np.linalg.norm(refined - corners, axis=1) > limit
+        refined[moved] = corners[moved]
+        return refined
+
+    def previous_block_size(self, corners):
+        pitch_x = (self.block_width or 0) + (self.span_cols or 0)
+        pitch_y = (self.block_height or 0) + (self.span_rows or 0)
+        if pitch_x <= 0 or pitch_y <= 0:
+            return 0, 0
+        width = np.linalg.norm(corners[1] - corners[0])
+        height = np.linalg.norm(corners[2] - corners[0])
+        ratio_x = self.block_width / pitch_x
+        ratio_y = self.block_height / pitch_y
+        return width / (self.columns - 1 + ratio_x) * ratio_x, height / (self.lines - 1 + ratio_y) * ratio_y
+
     def is_validate_positions(self):
         #print(self.top_left)
         if not self.top_left:
@@ -216,6 +338,7 @@ class Board:
             if new_configuration:
                 self.calculate_limits()
 
+            self.define_homography()
             self.define_centers()
             
             if new_configuration:
@@ -231,72 +354,236 @@ class Board:
         self.span_cols = round((self.width - (self.block_width * self.columns))/(self.columns - 1))
         self.span_rows = round((self.height - (self.block_height * self.lines))/(self.lines - 1))
 
+    def define_homography(self):
+        pitch_x = (self.block_width or 0) + (self.span_cols or 0)
+        pitch_y = (self.block_height or 0) + (self.span_rows or 0)
+        block_x = (self.block_width or 0) / pitch_x if pitch_x > 0 else 1
+        block_y = (self.block_height or 0) / pitch_y if pitch_y > 0 else 1
+        max_u = self.columns - 1 + block_x
+        max_v = self.lines - 1 + block_y
+
+        source = np.float32([self.top_left, self.top_right, self.bottom_left, self.bottom_right])
+        destination = np.float32([[0, 0], [max_u, 0], [0, max_v], [max_u, max_v]])
+        self.homography = cv2.getPerspectiveTransform(source, destination)
+        self.cell_offset = ((1 - block_x) / 2, (1 - block_y) / 2)
+
     def define_centers(self):
-        x = 0
-        y = 0
-        
-        for i in range(self.lines):
-            line = []
-            y = round(self.top_left[1] + self.block_height/2) if i == 0 else round(y + self.span_rows + self.block_height)
-            for j in range(self.columns):
-                x = round(self.top_left[0] + self.block_width/2) if j == 0 else round(x + self.span_cols + self.block_width)
-                line.append((x,y))
-            self.matrix_centers_board.append(line)
+        self.matrix_centers_board = []
+        if self.homography is None:
+            return
+
+        columns, lines = np.meshgrid(np.arange(self.columns), np.arange(self.lines))
+        cells = np.stack((columns.ravel(), lines.ravel()), axis=1) + 0.5 - self.cell_offset
+        centers = cv2.perspectiveTransform(cells.reshape(-1, 1, 2).astype(np.float32), np.linalg.inv(self.homography))
+        centers = np.round(centers.reshape(self.lines, self.columns, 2)).astype(int)
+        self.matrix_centers_board = [[tuple(center) for center in line] for line in centers.tolist()]
+
+    def cells_of(self, points):
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        if self.homography is None or len(points) == 0:
+            empty = np.zeros(len(points), dtype=int)
+            return empty, empty, np.zeros(len(points), dtype=bool)
+
+        projected = np.hstack((points, np.ones((len(points), 1)))) @ self.homography.T
+        cells = np.floor(projected[:, :2] / projected[:, 2:3] + self.cell_offset).astype(int)
+        columns, lines = cells[:, 0], cells[:, 1]
+        valid = (columns >= 0) & (columns < self.columns) & (lines >= 0) & (lines < self.lines)
+        return lines, columns, valid
 
     def block_in_board(self, block):
-        line = -1
-        column = -1
-        for i in range(self.lines):
-            for j in range(self.columns):
-                center_x = self.matrix_centers_board[i][j][0]
-                center_y = self.matrix_centers_board[i][j][1]
+        lines, columns, valid = self.cells_of([block[1]])
+        if not valid[0]:
+            return (-1, -1)
+        return (int(lines[0]), int(columns[0]))
+
+    def roi(self):
+        if self.recognizer.limits() is None:
+            return None
+        margin = max(self.block_width, self.block_height)
+        x0 = max(min(self.top_left[0], self.bottom_left[0]) - margin, 0)
+        y0 = max(min(self.top_left[1], self.top_right[1]) - margin, 0)
+        x1 = max(self.top_right[0], self.bottom_right[0]) + margin
+        y1 = max(self.bottom_left[1], self.bottom_right[1]) + margin
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def start_tracking(self):
+        if self.tracking_rate <= 0 or self.is_tracking():
+            return
+        self.tracker = BoardTrackerThread(self, self.tracking_rate, self.tracking_frames)
+        self.tracker.start()
+
+    def stop_tracking(self):
+        tracker, self.tracker = self.tracker, None
+        with self.stable_lock:
+            if tracker is not None:
+                tracker.stop()
+            self.stable_state = None
+            self.stable_time = None
+        if tracker is not None:
+            tracker.join(timeout=2)
+
+    def is_tracking(self):
+        return self.tracker is not None and self.tracker.is_alive()
+
+    def get_stable_state(self):
+        with self.stable_lock:
+            return self.stable_state, self.stable_time
+
+    def tracked_state(self):
+        requested = time.time()
+        tracker = self.tracker
+        if tracker is None or not tracker.is_alive():
+            return None
+        with self.stable_lock:
+            if self.stable_state is None or not tracker.settled():
+                return None
+            if tracker.read_time is None or tracker.read_time < requested - self.tracking_window:
+                return None
+            if not np.array_equal(tracker.candidate.matrix, self.stable_state.matrix):
+                return None
+            return self.stable_state
 
-                if block[1][0] >= (center_x - self.block_width) and block[1][0] <= (center_x + self.block_width):
-                    column = j
-                if block[1][1] >= (center_y - self.block_height) and block[1][1] <= (center_y + self.block_height):
-                    line = i
+    def avaliable_board(self):
+        state = self.tracked_state()
+        if state is None:
+            state = self.read_board()
 
-        return (line, column)
+        self.set_state(state)
 
-    def avaliable_board(self):
-        self.define_matrix_board()
-        image = self.camera.take_picture(delay = 1)
-        positions = self.recognizer.get_positions(image, True)
+    def request_evaluation(self):
+        if self.is_evaluating():
+            return False
+        self.evaluation = self.evaluate_async()
+        return True
+
+    def is_evaluating(self):
+        return self.evaluation is not None
 
-        for key, value in positions.items():
-            if key != 'board':
-                block = []
-                if key == 'block-01': block.append(1)
-                if key == 'block-02': block.append(2)
-                if key == 'block-03': block.append(3)
-                if key == 'block-04': block.append(4)
-                if key == 'block-05': block.append(5)
-                if key == 'block-06': block.append(6)
-                if key == 'block-07': block.append(7)
-                if key == 'block-08': block.append(8)
-                if key == 'block-09': block.append(9)
-
-                center_x = value.get('center_x')
-                center_y = value.get('center_y')
-                block.append((center_x, center_y))
-                pos = self.block_in_board(block)
-                self.matrix_board[pos[0]][pos[1]] = block[0]
+    def evaluation_ready(self):
+        if self.evaluation is None or not self.evaluation.done():
+            return False
+
+        future, self.evaluation = self.evaluation, None
+        context, self.evaluation_context = self.evaluation_context, None
+        try:
+            state = future.result()
+            if context is not None:
+                state = self.state_of(self.readings_of(state, *context))
+        except Exception:
+            logging.exception('|Board|Falha na avaliação assíncrona do tabuleiro')
+            DebugWriter.error()
+            self.evaluation_error = True
+            return False
+        self.set_state(state)
+        return True
+
+    def evaluation_failed(self):
+        failed, self.evaluation_error = self.evaluation_error, False
+        return failed
+
+    def evaluate_async(self, draw_box = True):
+        self.evaluation_context = None
+        result = Future()
+        state = self.tracked_state()
+        if state is not None:
+            result.set_result(state)
+            return result
+
+        limits = self.recognizer.limits()
+        if limits is None:
+            result.set_result(BoardState.empty(self.lines, self.columns))
+            return result
+
+        roi = self.roi()
+        offset = roi[:2]
+        images = self.camera.take_pictures(max(self.voting_frames, 1), delay = 1, roi = roi)
+
+        decision, region = None, None
+        if self.recognizer.motion_gate is not None and len(images) > 0:
+            decision, region = self.recognizer.gate_check(images[-1], offset)
+            if decision == MotionGate.STATIC:
+                positions = self.recognizer.motion_gate.cached_positions()
+                self.recognizer.gate_update(decision, images[-1], offset, positions)
+                result.set_result(self.state_of([positions]))
+                return result
+
+        self.evaluation_context = (images, offset, decision, region, draw_box)
+        return self.app.recognition_executor.submit(images, limits, offset, region)
+
+    def readings_of(self, readings, images, offset, decision, region, draw_box):
+        if decision == MotionGate.PARTIAL:
+            outside = self.recognizer.outside_region(region, offset)
+            readings = [dict(outside, **positions) for positions in readings]
+        if decision is not None and len(readings) > 0:
+            self.recognizer.gate_update(decision, images[-1], offset, readings[-1])
+        if draw_box and len(readings) > 0:
+            self.recognizer.draw_predictions(images[-1], readings[-1], offset)
+        return readings
+
+    def set_state(self, state):
+        self.state = state
+
+    def diff_from(self, positions):
+        return BoardDiff(positions, self.state.positions())
+
+    def read_board(self, draw_box = True):
+        if self.voting_frames > 1:
+            return self.read_board_voting(draw_box)
+
+        roi = self.roi()
+        offset = roi[:2] if roi is not None else (0, 0)
+        image = self.camera.take_picture(delay = 1, roi = roi)
+        positions = self.recognizer.get_positions(image, draw_box, offset)
+        return BoardState(self.matrix_of(positions))
+
+    def read_board_voting(self, draw_box = True):
+        roi = self.roi()
+        offset = roi[:2] if roi is not None else (0, 0)
+        images = self.camera.take_pictures(self.voting_frames, delay = 1, roi = roi)
+        return self.state_of(self.recognizer.get_positions_batch(images, draw_box, offset))
+
+    def state_of(self, readings):
+        if len(readings) == 1:
+            return BoardState(self.matrix_of(readings[0]))
+
+        votes = np.zeros((self.lines, self.columns, len(BLOCK_VALUES) + 1))
+        for positions in readings:
+            confidences = np.zeros((self.lines, self.columns))
+            matrix = self.matrix_of(positions, confidences)
+            votes[:, :, 0] += np.where(matrix == 0, EMPTY_VOTE, 0)
+            np.add.at(votes, (*np.indices(matrix.shape), matrix), confidences)
+
+        total = votes.sum(axis=2)
+        matrix = votes.argmax(axis=2).astype(np.int8)
+        score = votes.max(axis=2)
+
+        for value in np.unique(matrix[matrix != 0]):
+            lines, columns = np.nonzero(matrix == value)
+            best = score[lines, columns].argmax()
+            duplicates = np.arange(len(lines)) != best
+            matrix[lines[duplicates], columns[duplicates]] = 0
+            score[lines[duplicates], columns[duplicates]] = votes[lines[duplicates], columns[duplicates], 0]
+
+        agreement = np.divide(score, total, out=np.ones_like(score), where=total > 0)
+        logging.info(f'|Board|VOTING[{len(readings)}]:AGREEMENT[{agreement.min():.2f}]')
+        return BoardState(matrix, agreement)
+
+    def matrix_of(self, positions, confidences = None):
+        matrix = np.zeros((self.lines, self.columns), dtype=np.int8)
+        blocks = [(BLOCK_VALUES[key], value.get('center_x'), value.get('center_y'), value.get('confidence', 1)) for key, value in positions.items() if key in BLOCK_VALUES]
+        if len(blocks) > 0:
+            blocks = np.array(blocks)
+            lines, columns, valid = self.cells_of(blocks[:, 1:3])
+            matrix[lines[valid], columns[valid]] = blocks[valid, 0]
+            if confidences is not None:
+                confidences[lines[valid], columns[valid]] = blocks[valid, 3]
+        return matrix
 
     def result_matrix_board(self):
-        numbers = []
-        for i in range(self.lines):
-            for j in range(self.columns):
-                if self.matrix_board[i][j] != 0:
-                    numbers.append(self.matrix_board[i][j])
-        return numbers
+        return list(self.state.values())
     
     def values_positions(self):
-        result = {}
-        for i in range(self.lines):
-            for j in range(self.columns):
-                if self.matrix_board[i][j] != 0:
-                    result[self.matrix_board[i][j]] = (i+1, j+1)
-        return result
+        return dict(self.state.positions())
 
         
 
@@ -321,10 +608,19 @@ class Board:
         pos_y += offset
         x = pos_x
 
+        corners = {
+            (0, 0): '1',
+            (0, self.lines - 1): '2',
+            (self.columns - 1, 0): '3',
+            (self.columns - 1, self.lines - 1): '4'
+        }
+
         for col in range(0, self.columns):
             y = pos_y
             for lin in range(0, self.lines):
-                if side == 'left' and col == 0 and (lin == 0 or lin == self.lines -1):
+                if side == 'auto' and (col, lin) in corners:
+                    color = (180,0,0,255)
+                elif side == 'left' and col == 0 and (lin == 0 or lin == self.lines -1):
                     color = (180,0,0,255)
                 elif side == 'right' and col == self.columns - 1 and (lin == 0 or lin == self.lines -1):
                     color = (180,0,0,255)
@@ -336,15 +632,21 @@ class Board:
                 display.blit(shape, rect)
 
 
-                if (side == 'left' and col == 0 and lin == 0) or (side == 'right' and col == self.columns - 1 and lin == 0):
-                    text_1 = font.render("1", True, (255,255,255))
-                    text_1_rect = text_1.get_rect(center=(x+box_width/2, y+box_height/2))
-                    display.blit(text_1, text_1_rect)
-                
-                if (col == 0 and lin == self.lines - 1) or (side == 'right' and col == self.columns - 1 and lin == self.lines - 1):
-                    text_2 = font.render("2", True, (255,255,255))
-                    text_2_rect = text_2.get_rect(center=(x+box_width/2, y+box_height/2))
-                    display.blit(text_2, text_2_rect)
+                if side == 'auto':
+                    if (col, lin) in corners:
+                        text_corner = font.render(corners[(col, lin)], True, (255,255,255))
+                        text_corner_rect = text_corner.get_rect(center=(x+box_width/2, y+box_height/2))
+                        display.blit(text_corner, text_corner_rect)
+                else:
+                    if (side == 'left' and col == 0 and lin == 0) or (side == 'right' and col == self.columns - 1 and lin == 0):
+                        text_1 = font.render("1", True, (255,255,255))
+                        text_1_rect = text_1.get_rect(center=(x+box_width/2, y+box_height/2))
+                        display.blit(text_1, text_1_rect)
+                    
+                    if (col == 0 and lin == self.lines - 1) or (side == 'right' and col == self.columns - 1 and lin == self.lines - 1):
+                        text_2 = font.render("2", True, (255,255,255))
+                        text_2_rect = text_2.get_rect(center=(x+box_width/2, y+box_height/2))
+                        display.blit(text_2, text_2_rect)
 
                 y += box_height + offset
             x += box_width + offset
@@ -353,4 +655,8 @@ class Board:
         if side == 'right':
             pos_text = (screen_width-200, 100)
 
-        message_box.draw_speech_bubble(display, "Posicione os blocos\n1 e 2 conforme\nexibido na imagem\n\nApós, pressionar\no botão verde", (255, 255, 255), (0, 0, 0), pos_text, 14)
+        message = "Posicione os blocos\n1 e 2 conforme\nexibido na imagem\n\nApós, pressionar\no botão verde"
+        if side == 'auto':
+            message = "Posicione os blocos\n1, 2, 3 e 4 nos\ncantos conforme\nexibido na imagem\n\nApós, pressionar\no botão verde"
+
+        message_box.draw_speech_bubble(display, message, (255, 255, 255), (0, 0, 0), pos_text, 14)
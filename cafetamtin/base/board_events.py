@@ -0,0 +1,85 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+class BoardEvent:
+    ADDED = 'added'
+    REMOVED = 'removed'
+    MOVED = 'moved'
+    UNCHANGED = 'unchanged'
+
+    def __init__(self, type, value, position = None, previous_position = None):
+        self.type = type
+        self.value = value
+        self.position = position
+        self.previous_position = previous_position
+
+    def __repr__(self):
+        return f'BoardEvent({self.type}, {self.value}, {self.previous_position} -> {self.position})'
+
+    def __eq__(self, other):
+        if isinstance(other, BoardEvent):
+            return (self.type == other.type and self.value == other.value and
+                    self.position == other.position and self.previous_position == other.previous_position)
+        return False
+
+    def __hash__(self):
+        return hash((self.type, self.value, self.position, self.previous_position))
+
+class BoardDiff:
+
+    def __init__(self, previous = None, current = None):
+        previous = previous or {}
+        current = current or {}
+        self.events = []
+
+        for value, position in current.items():
+            old = previous.get(value)
+            if old is None:
+                self.events.append(BoardEvent(BoardEvent.ADDED, value, tuple(position)))
+            elif tuple(old) != tuple(position):
+                self.events.append(BoardEvent(BoardEvent.MOVED, value, tuple(position), tuple(old)))
+            else:
+                self.events.append(BoardEvent(BoardEvent.UNCHANGED, value, tuple(position), tuple(old)))
+
+        for value, position in previous.items():
+            if value not in current:
+                self.events.append(BoardEvent(BoardEvent.REMOVED, value, None, tuple(position)))
+
+    def values(self, type):
+        return [event.value for event in self.events if event.type == type]
+
+    @property
+    def added(self):
+        return self.values(BoardEvent.ADDED)
+
+    @property
+    def removed(self):
+        return self.values(BoardEvent.REMOVED)
+
+    @property
+    def moved(self):
+        return self.values(BoardEvent.MOVED)
+
+    @property
+    def unchanged(self):
+        return self.values(BoardEvent.UNCHANGED)
+
+    def has_changes(self):
+        return any(event.type != BoardEvent.UNCHANGED for event in self.events)
+
+    def __repr__(self):
+        return f'BoardDiff(added={self.added}, removed={self.removed}, moved={self.moved})'
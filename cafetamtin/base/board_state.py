@@ -0,0 +1,76 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import numpy as np
+
+class BoardState:
+
+    def __init__(self, matrix, agreement = None):
+        self.matrix = np.asarray(matrix, dtype=np.int8)
+        self.matrix.setflags(write=False)
+        self.agreement = agreement
+        self.__values = None
+        self.__positions = None
+        self.__triples = {}
+
+    @classmethod
+    def empty(cls, lines, columns):
+        return cls(np.zeros((lines, columns), dtype=np.int8))
+
+    @classmethod
+    def from_positions(cls, positions, lines, columns):
+        matrix = np.zeros((lines, columns), dtype=np.int8)
+        for value, (line, column) in positions.items():
+            matrix[line - 1, column - 1] = value
+        return cls(matrix)
+
+    @property
+    def lines(self):
+        return self.matrix.shape[0]
+
+    @property
+    def columns(self):
+        return self.matrix.shape[1]
+
+    def values(self):
+        if self.__values is None:
+            self.__values = self.matrix[self.matrix != 0].tolist()
+        return self.__values
+
+    def positions(self):
+        if self.__positions is None:
+            lines, columns = np.nonzero(self.matrix)
+            values = self.matrix[lines, columns]
+            self.__positions = {int(v): (int(l) + 1, int(c) + 1) for v, l, c in zip(values, lines, columns)}
+        return self.__positions
+
+    def window(self, size = 3):
+        line = (self.lines - size) // 2
+        column = (self.columns - size) // 2
+        return self.matrix[line:line + size, column:column + size]
+
+    def axes(self, size = 3):
+        window = self.window(size)
+        return np.vstack((window, window.T, window.diagonal(), np.fliplr(window).diagonal()[::-1]))
+
+    def sums(self, size = 3):
+        return self.axes(size).sum(axis=1, dtype=int)
+
+    def triples(self, size = 3):
+        if size not in self.__triples:
+            self.__triples[size] = [axis[axis != 0].tolist() for axis in self.axes(size)]
+        return [list(triple) for triple in self.__triples[size]]
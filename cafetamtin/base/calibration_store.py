@@ -0,0 +1,130 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import copy
+import logging
+import weakref
+from pony.orm import *
+from threading import RLock
+
+from database.models import DBBoard
+
+FIELDS = (
+    'lines', 'columns', 'width', 'height',
+    'top_left_x', 'top_left_y', 'top_right_x', 'top_right_y',
+    'bottom_left_x', 'bottom_left_y', 'bottom_right_x', 'bottom_right_y',
+    'block_width', 'block_height', 'span_cols', 'span_rows'
+)
+
+class Calibration:
+
+    def __init__(self, id = None, **fields):
+        self.id = id
+        for field in FIELDS:
+            setattr(self, field, fields.get(field))
+        if self.lines is None:
+            self.lines = 7
+        if self.columns is None:
+            self.columns = 7
+
+    @classmethod
+    def from_dbboard(cls, board):
+        return cls(board.id, **{field: getattr(board, field) for field in FIELDS})
+
+    @classmethod
+    def from_board(cls, board):
+        return cls(
+            board.id,
+            lines = board.lines,
+            columns = board.columns,
+            width = board.width,
+            height = board.height,
+            top_left_x = board.top_left[0] if board.top_left else None,
+            top_left_y = board.top_left[1] if board.top_left else None,
+            top_right_x = board.top_right[0] if board.top_right else None,
+            top_right_y = board.top_right[1] if board.top_right else None,
+            bottom_left_x = board.bottom_left[0] if board.bottom_left else None,
+            bottom_left_y = board.bottom_left[1] if board.bottom_left else None,
+            bottom_right_x = board.bottom_right[0] if board.bottom_right else None,
+            bottom_right_y = board.bottom_right[1] if board.bottom_right else None,
+            block_width = board.block_width,
+            block_height = board.block_height,
+            span_cols = board.span_cols,
+            span_rows = board.span_rows
+        )
+
+    def values(self):
+        return {field: getattr(self, field) for field in FIELDS}
+
+class CalibrationStore:
+    __calibration = None
+    __loaded = False
+    __lock = RLock()
+    __subscribers = weakref.WeakSet()
+
+    @classmethod
+    def get(cls):
+        with cls.__lock:
+            if not cls.__loaded:
+                cls.__calibration = cls.__load()
+                cls.__loaded = True
+            return copy.copy(cls.__calibration) if cls.__calibration is not None else None
+
+    @classmethod
+    @db_session
+    def __load(cls):
+        board = DBBoard.select().order_by(desc(DBBoard.id)).first()
+        logging.info(f'|CalibrationStore|LOAD[{board.id if board else None}]')
+        return Calibration.from_dbboard(board) if board else None
+
+    @classmethod
+    def save(cls, calibration, source = None):
+        with cls.__lock:
+            calibration.id = cls.__write(calibration)
+            cls.__calibration = copy.copy(calibration)
+            cls.__loaded = True
+            subscribers = [subscriber for subscriber in cls.__subscribers if subscriber is not source]
+
+        for subscriber in subscribers:
+            subscriber.calibration_changed(copy.copy(calibration))
+        return calibration.id
+
+    @classmethod
+    @db_session
+    def __write(cls, calibration):
+        if calibration.id is not None and DBBoard.exists(id=calibration.id):
+            DBBoard[calibration.id].set(**calibration.values())
+            return calibration.id
+        board = DBBoard(**calibration.values())
+        flush()
+        return board.id
+
+    @classmethod
+    def subscribe(cls, subscriber):
+        with cls.__lock:
+            cls.__subscribers.add(subscriber)
+
+    @classmethod
+    def unsubscribe(cls, subscriber):
+        with cls.__lock:
+            cls.__subscribers.discard(subscriber)
+
+    @classmethod
+    def invalidate(cls):
+        with cls.__lock:
+            cls.__calibration = None
+            cls.__loaded = False
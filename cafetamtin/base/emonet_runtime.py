@@ -0,0 +1,165 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import time
+import json
+import logging
+import torch
+from pathlib import Path
+
+from emonet.models import EmoNet
+
+def data_path():
+    return Path(__file__).absolute().parent.parent.parent.joinpath('data')
+
+def load_emonet(n_expression = 8, temporal_smoothing = False):
+    net = EmoNet(n_expression=n_expression, temporal_smoothing=temporal_smoothing)
+    state_dict = torch.load(
+        str(data_path().joinpath('affectnet', f'emonet_{n_expression}.pth')),
+        map_location='cpu'
+    )
+    state_dict = {k.replace('module.',''):v for k,v in state_dict.items()}
+    net.load_state_dict(state_dict, strict=False)
+    net.train(False)
+    return net
+
+def quantized_path(n_expression = 8):
+    return data_path().joinpath('affectnet', f'emonet_{n_expression}_int8.pt')
+
+def load_emonet_variant(variant = 'float', n_expression = 8, temporal_smoothing = False):
+    if variant == 'int8':
+        path = quantized_path(n_expression)
+        if path.exists():
+            report = path.with_suffix('.json')
+            if report.exists():
+                with open(report) as f:
+                    torch.backends.quantized.engine = json.load(f).get('engine', torch.backends.quantized.engine)
+            return torch.jit.load(str(path), map_location='cpu')
+        logging.warning(f'|EmoNetRuntime|Modelo quantizado não encontrado em {path}, usando o modelo float')
+    return load_emonet(n_expression, temporal_smoothing)
+
+class EmoNetRuntime:
+
+    def __init__(self, net, threads = 0, script = True, channels_last = True, input_size = 256):
+        self.net = net
+        self.threads = threads
+        self.channels_last = channels_last
+        self.input_size = input_size
+        self.scripted = False
+        self.warmup_time = None
+        self.buffer = None
+
+        if threads:
+            torch.set_num_threads(threads)
+            try:
+                torch.set_num_interop_threads(1)
+            except RuntimeError:
+                pass
+
+        net.train(False)
+        if isinstance(net, torch.jit.ScriptModule):
+            self.channels_last = False
+            self.scripted = True
+            self.model = net
+            return
+
+        if channels_last:
+            net = net.to(memory_format=torch.channels_last)
+
+        self.model = net
+        if script and not getattr(net, 'temporal_smoothing', False):
+            self.model = self.__script(net)
+
+    def __script(self, net):
+        example = self.example()
+        try:
+            with torch.inference_mode():
+                traced = torch.jit.trace(net, example, strict=False)
+            model = torch.jit.freeze(traced)
+            self.scripted = True
+            return model
+        except Exception:
+            logging.exception('|EmoNetRuntime|Falha ao compilar o modelo, usando o modo eager')
+            return net
+
+    def example(self, batch_size = 1):
+        example = torch.zeros(batch_size, 3, self.input_size, self.input_size)
+        if self.channels_last:
+            example = example.contiguous(memory_format=torch.channels_last)
+        return example
+
+    def __call__(self, batch, stream = None):
+        if self.channels_last:
+            batch = batch.contiguous(memory_format=torch.channels_last)
+        with torch.inference_mode():
+            if self.smoothing:
+                return self.model(batch, stream=stream)
+            return self.model(batch)
+
+    def batch(self, crops):
+        count = len(crops)
+        if self.buffer is None or self.buffer.shape[0] < count:
+            self.buffer = torch.empty(count, 3, self.input_size, self.input_size)
+            if self.channels_last:
+                self.buffer = self.buffer.contiguous(memory_format=torch.channels_last)
+
+        batch = self.buffer[:count]
+        for i, crop in enumerate(crops):
+            batch[i].copy_(torch.from_numpy(crop).permute(2, 0, 1))
+        return batch.div_(255)
+
+    def predict(self, crops, stream = None):
+        if len(crops) == 0:
+            return [], None
+
+        out = self(self.batch(crops), stream)
+        probabilities = torch.softmax(out['expression'], dim=1).cpu().numpy()
+        valence = out['valence'].cpu().numpy().reshape(-1)
+        arousal = out['arousal'].cpu().numpy().reshape(-1)
+
+        results = [
+            {
+                'expression': int(probabilities[i].argmax()),
+                'probabilities': probabilities[i],
+                'valence': float(valence[i]),
+                'arousal': float(arousal[i])
+            }
+            for i in range(len(crops))
+        ]
+        mean = probabilities.mean(axis=0)
+        fused = {
+            'expression': int(mean.argmax()),
+            'probabilities': mean,
+            'valence': float(valence.mean()),
+            'arousal': float(arousal.mean())
+        }
+        return results, fused
+
+    @property
+    def smoothing(self):
+        return getattr(self.model, 'temporal_smoothing', False)
+
+    def reset_smoothing(self, stream = None):
+        if self.smoothing:
+            self.model.reset_smoothing(stream)
+
+    def warm_up(self, repetitions = 2):
+        st = time.time()
+        for i in range(repetitions):
+            self(self.example())
+        self.warmup_time = time.time() - st
+        logging.info(f'|EmoNetRuntime|SCRIPTED[{self.scripted}]:THREADS[{torch.get_num_threads()}]:WARMUP[{self.warmup_time:.3f}]')
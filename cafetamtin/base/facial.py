@@ -15,139 +15,366 @@
 # You should have received a copy of the GNU General Public License
 # along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
 
+import os
 import cv2
 import time
 import dlib
+import queue
 import logging
 import numpy as np
-from pathlib import Path
 from imutils import face_utils
-from imutils import face_utils, rotate_bound
-
-#Import biblioteca torch
-import torch
-from torch import nn
-from torch.utils.data import DataLoader
-from torch.utils.data.sampler import WeightedRandomSampler
-from torchvision import transforms
 
 from threading import Thread
+from collections import deque
+from pony.orm import db_session
 
 #importa biblioteca Rede Neural Profunda
-from emonet.models import EmoNet
+from base.emonet_runtime import EmoNetRuntime, load_emonet_variant, data_path
+from base.affect_timeline import AffectTimeline
+from database.models import DBAffectSeries
 
-class FacialThread(Thread):
-    
-    def __init__ (self, app, id = None, action = None):
+# dlib's frontal detector scans an 80x80 window; keep some margin above it
+MIN_FACE_SIZE = 100
+
+def quadrant(expression, valence, arousal):
+    if expression == 'fear' or expression == 'anger' or expression == 'disgust' or expression == 'contempt':
+        return 'Q2'
+    elif expression == 'sad':
+        return 'Q3'
+    elif expression == 'surprise':
+        return 'Q1' if valence > 0 else 'Q2'
+    elif expression == 'happy':
+        return 'Q1' if arousal > 0 else 'Q4'
+    return 'QN'
+
+class AffectWorker(Thread):
+
+    def __init__(self, facial, queue_size = 8, sampling_rate = 0):
         Thread.__init__(self)
-        self.app = app
-        self.id = id
-        self.action = action
-        self.expression = ''
-        self.valence = None
-        self.arousal = None
-        self.quad = ''
-        
-    
+        self.daemon = True
+        self.facial = facial
+        self.jobs = queue.Queue(maxsize=queue_size)
+        self.interval = 1 / sampling_rate if sampling_rate > 0 else None
+        self.sampling = False
+        self.timeline = AffectTimeline()
+        self.samples = 0
+        self.running = False
+        self.processed = 0
+        self.coalesced = 0
+        self.dropped = 0
+        self.failed = 0
+        self.latencies = deque(maxlen=100)
+
+    def submit(self, id, action, phase = None):
+        try:
+            self.jobs.put_nowait((time.time(), id, action, phase))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            logging.warning(f'|AffectWorker|DROPPED[{id}]:STATS[{self.stats()}]')
+            return False
+
+    def start_sampling(self):
+        if self.interval is None:
+            return
+        self.timeline.take()
+        self.facial.reset_smoothing()
+        self.sampling = True
+
+    def stop_sampling(self):
+        self.sampling = False
+
     def run(self):
-        expression, valence, arousal = self.app.facial.evaluate()
-        self.expression = expression
-        self.valence = valence
-        self.arousal = arousal
-        self.calculateQuad()
-        logging.info(f'|Facial|EXPRESSION[{self.expression}]:QUAD[{self.quad}]:VALENCE[{self.valence}]:AROUSAL[{self.arousal}]')
-        self.action(self.id, self.expression, self.quad)
-        
-    def calculateQuad(self):
-        if self.expression == 'fear' or self.expression == 'anger' or self.expression == 'disgust' or self.expression == 'contempt':
-            self.quad = 'Q2'
-        elif self.expression == 'sad':
-            self.quad = 'Q3'
-        elif self.expression == 'surprise':
-            if self.valence > 0:
-                self.quad = 'Q1'
-            else:
-                self.quad = 'Q2'
-        elif self.expression == 'happy':
-            if self.arousal > 0:
-                self.quad = 'Q1'
-            else:
-                self.quad = 'Q4'
+        self.running = True
+        while self.running:
+            try:
+                job = self.jobs.get(timeout=self.interval if self.sampling else 0.5)
+            except queue.Empty:
+                if self.sampling:
+                    self.sample()
+                continue
+            if job is None:
+                break
+
+            jobs = [job]
+            while True:
+                try:
+                    job = self.jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if job is None:
+                    self.running = False
+                    break
+                jobs.append(job)
+            self.coalesced += len(jobs) - 1
+            self.process(jobs)
+
+    def sample(self):
+        try:
+            result = self.facial.sample()
+        except Exception:
+            logging.exception('|AffectWorker|Falha na amostragem facial')
+            return
+        if result is not None:
+            self.timeline.append(*result)
+            self.samples += 1
+
+    def process(self, jobs):
+        samples = self.timeline.take() if self.interval is not None else None
+        self.facial.reset_smoothing()
+        aggregates = None
+        if samples is not None and len(samples) > 0:
+            aggregates = AffectTimeline.aggregates(samples, self.facial.expressions, quadrant)
+
+        if aggregates is not None:
+            expression, valence, arousal = aggregates['expression'], aggregates['valence'], aggregates['arousal']
+            quad = aggregates['quad']
         else:
-            self.quad = 'QN'
-            
-        if self.quad == '':
-            self.quad = 'QN'
-        
+            try:
+                expression, valence, arousal = self.facial.evaluate()
+            except Exception:
+                self.failed += len(jobs)
+                logging.exception('|AffectWorker|Falha na análise facial')
+                return
+            quad = quadrant(expression, valence, arousal)
+
+        logging.info(f'|Facial|EXPRESSION[{expression}]:QUAD[{quad}]:VALENCE[{valence}]:AROUSAL[{arousal}]:SAMPLES[{len(samples) if samples is not None else 1}]')
+        for submitted, id, action, phase in jobs:
+            try:
+                action(id, expression, quad)
+                if aggregates is not None and phase is not None:
+                    self.save_series(phase, id, samples, aggregates)
+                self.processed += 1
+            except Exception:
+                self.failed += 1
+                logging.exception(f'|AffectWorker|Falha ao registrar o estado afetivo[{id}]')
+            self.latencies.append(time.time() - submitted)
+        logging.info(f'|AffectWorker|JOBS[{len(jobs)}]:STATS[{self.stats()}]')
+
+    @db_session
+    def save_series(self, phase, challenge, samples, aggregates):
+        DBAffectSeries(
+            phase = phase,
+            challenge = challenge,
+            samples = len(samples),
+            affective_state = aggregates['expression'],
+            affective_quad = aggregates['quad'],
+            valence = aggregates['valence'],
+            arousal = aggregates['arousal'],
+            quad_histogram = ','.join(f'{quad}:{count}' for quad, count in aggregates['histogram'].items()),
+            data = AffectTimeline.pack(samples)
+        )
+
+    def stop(self):
+        self.running = False
+        try:
+            self.jobs.put_nowait(None)
+        except queue.Full:
+            pass
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            'queue': self.jobs.qsize(),
+            'processed': self.processed,
+            'coalesced': self.coalesced,
+            'dropped': self.dropped,
+            'failed': self.failed,
+            'samples': self.samples,
+            'latency': sum(latencies) / len(latencies) if latencies else 0,
+            'max_latency': max(latencies) if latencies else 0,
+            'faces': self.facial.locator.stats()
+        }
+
+class FaceLocator:
+
+    def __init__(self, scale = 0.5, alignment = False, tracking_interval = 0, tracking_quality = 7):
+        self.scale = scale
+        self.alignment = alignment
+        self.tracking_interval = tracking_interval
+        self.tracking_quality = tracking_quality
+        self.detector = dlib.get_frontal_face_detector()
+        self.predictor = None
+        self.tracker = None
+        self.tracked_samples = 0
+        self.current_factor = 1
+        self.detections = 0
+        self.fallbacks = 0
+        self.tracked = 0
+
+    def locate(self, image):
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        small = self.downscale(gray)
+
+        box = self.track(small)
+        if box is None:
+            box = self.detect(gray, small)
+        if box is None:
+            return None
+
+        height, width = image.shape[:2]
+        x, y, w, h = box
+        x0, y0 = max(x, 0), max(y, 0)
+        x1, y1 = min(x + w, width), min(y + h, height)
+        if x1 <= x0 or y1 <= y0:
+            return None
+        return (x0, y0, x1 - x0, y1 - y0)
+
+    def factor(self):
+        return self.current_factor
+
+    def downscale(self, gray):
+        if self.factor() >= 1:
+            return gray
+        return cv2.resize(gray, None, fx=self.factor(), fy=self.factor(), interpolation=cv2.INTER_AREA)
+
+    def update_factor(self, box):
+        if self.scale >= 1:
+            self.current_factor = 1
+        else:
+            self.current_factor = min(max(self.scale, MIN_FACE_SIZE / max(box[2], 1)), 1)
+
+    def detect(self, gray, small):
+        self.tracker = None
+        box = None
+        if small is not gray:
+            box = self.scaled(self.largest(self.detector(small, 0)), 1 / self.factor())
+            if box is None:
+                self.fallbacks += 1
+        if box is None:
+            box = self.scaled(self.largest(self.detector(gray, 0)), 1)
+        self.detections += 1
+
+        if box is not None:
+            self.update_factor(box)
+            if self.tracking_interval > 0:
+                x, y, w, h = [int(v * self.factor()) for v in box]
+                self.tracker = dlib.correlation_tracker()
+                self.tracker.start_track(self.downscale(gray), dlib.rectangle(x, y, x + w, y + h))
+                self.tracked_samples = 0
+        return box
+
+    def track(self, small):
+        if self.tracker is None or self.tracked_samples >= self.tracking_interval:
+            return None
+        if self.tracker.update(small) < self.tracking_quality:
+            return None
+        self.tracked_samples += 1
+        self.tracked += 1
+        position = self.tracker.get_position()
+        rect = dlib.rectangle(int(position.left()), int(position.top()), int(position.right()), int(position.bottom()))
+        return self.scaled(rect, 1 / self.factor())
+
+    def largest(self, rects):
+        if len(rects) == 0:
+            return None
+        return max(rects, key=lambda r: r.width() * r.height())
+
+    def scaled(self, rect, factor):
+        if rect is None:
+            return None
+        return (
+            int(rect.left() * factor),
+            int(rect.top() * factor),
+            int(rect.width() * factor),
+            int(rect.height() * factor)
+        )
+
+    def stats(self):
+        return {
+            'detections': self.detections,
+            'fallbacks': self.fallbacks,
+            'tracked': self.tracked,
+            'factor': self.factor()
+        }
+
+    def landmarks(self, image, box):
+        if self.predictor is None:
+            self.predictor = dlib.shape_predictor(
+                str(data_path().joinpath('affectnet', 'shape_predictor_68_face_landmarks.dat'))
+            )
+        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
+        x, y, w, h = box
+        shape = self.predictor(gray, dlib.rectangle(x, y, x + w, y + h))
+        return face_utils.shape_to_np(shape)
+
+    def crop(self, image, box):
+        x, y, w, h = box
+        if self.alignment:
+            shape = self.landmarks(image, box)
+            left_eye = shape[36:42].mean(axis=0)
+            right_eye = shape[42:48].mean(axis=0)
+            angle = np.degrees(np.arctan2(right_eye[1] - left_eye[1], right_eye[0] - left_eye[0]))
+            matrix = cv2.getRotationMatrix2D((x + w / 2, y + h / 2), angle, 1.0)
+            image = cv2.warpAffine(image, matrix, image.shape[1::-1])
+        return image[y:y+h, x:x+w]
 
 class Facial:
     
     def __init__(self, app):
         self.app = app
         self.camera = self.app.camera_student
-        self.net = EmoNet(n_expression=8).to()
-        self.state_dict = torch.load(
-            str(self.__get_data_path().joinpath('affectnet', 'emonet_8.pth')),
-            map_location='cpu'
+        self.net = load_emonet_variant(
+            os.getenv('EMONET_VARIANT', 'float'),
+            n_expression=8,
+            temporal_smoothing=bool(int(os.getenv('EMONET_SMOOTHING', 0)))
         )
-        self.state_dict = {k.replace('module.',''):v for k,v in self.state_dict.items()}
-        self.net.load_state_dict(self.state_dict, strict=False)
-        self.net.eval()
-        self.transform_image = transforms.Compose([transforms.ToTensor()])
-        self.detector = dlib.get_frontal_face_detector()
-        self.predictor = dlib.shape_predictor(
-            str(self.__get_data_path().joinpath('affectnet', 'shape_predictor_68_face_landmarks.dat'))
+        self.runtime = EmoNetRuntime(
+            self.net,
+            threads=int(os.getenv('EMONET_THREADS', 2)),
+            script=bool(int(os.getenv('EMONET_SCRIPT', 1)))
+        )
+        self.runtime.warm_up()
+        self.burst_frames = int(os.getenv('AFFECT_BURST_FRAMES', 1))
+        self.locator = FaceLocator(
+            scale=float(os.getenv('FACE_DETECTION_SCALE', 0.5)),
+            alignment=bool(int(os.getenv('FACE_ALIGNMENT', 0))),
+            tracking_interval=int(os.getenv('FACE_TRACKING_INTERVAL', 5)),
+            tracking_quality=float(os.getenv('FACE_TRACKING_QUALITY', 7))
         )
         self.__expressions = {0: 'neutral', 1:'happy', 2:'sad', 3:'surprise', 4:'fear', 5:'disgust', 6:'anger', 7:'contempt', 8:'none'}
         
-    def __get_data_path(self):
-        path = Path(__file__).absolute()
-        path = path.parent.parent.parent
-        return path.joinpath('data')
-    
+    @property
+    def expressions(self):
+        return self.__expressions
+
     def evaluate(self):
-        st = time.time()
         expression = ''
         valence = None
         arousal = None
-        
-        image = self.camera.take_picture(delay = 6, width=412, process=False)
-        gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
-        rects = self.detector(gray, 0)
-
-        # loop sobre detecção de faces
-        for rect in rects:
-            shape = self.predictor(gray, rect)
-            shape = face_utils.shape_to_np(shape)
-
-            x,y, w, h = rect.left(), rect.top(), rect.width(), rect.height()
-            if y>0 and x>0:
-                crop_img = image[y:y+h, x:x+w]
-                dim = (256, 256)
-                
-                resized = cv2.resize(crop_img, dim)
-                
-                image_cropada = self.transform_image(resized)
-                image_cropada = image_cropada.unsqueeze(0)
-                
-                with torch.no_grad():
-                    out = self.net(image_cropada)
-
-                expr = out['expression']
-                expr = np.argmax(np.squeeze(expr.cpu().numpy()), axis=0)
-                
-                val = out['valence']
-                ar = out['arousal']
-
-                val = np.squeeze(val.cpu().numpy())
-                ar = np.squeeze(ar.cpu().numpy())
-
-                expression = self.__expressions.get(int(expr))
-                valence = val
-                arousal = ar
-        
-        et = time.time()
-        elapsed_time = et - st
+
+        if self.burst_frames > 1:
+            frames = self.camera.take_pictures(self.burst_frames, delay = 6, width=412, process=False)
+            crops = [crop for crop in (self.face_crop(frame) for frame in frames) if crop is not None]
+            results, result = self.runtime.predict(crops)
+        else:
+            result = self.predict(self.camera.take_picture(delay = 6, width=412, process=False))
+
+        if result is not None:
+            expression = self.__expressions.get(result['expression'])
+            valence = result['valence']
+            arousal = result['arousal']
         
         return expression, valence, arousal
-                
\ No newline at end of file
+
+    def reset_smoothing(self, stream = 'student'):
+        self.runtime.reset_smoothing(stream)
+
+    def sample(self, delay = 0, stream = 'student'):
+        result = self.predict(self.camera.take_picture(delay = delay, width=412, process=False), stream)
+        if result is None:
+            return None
+        return result['expression'], result['valence'], result['arousal']
+
+    def predict(self, image, stream = None):
+        crop = self.face_crop(image)
+        if crop is None:
+            return None
+        results, fused = self.runtime.predict([crop], stream)
+        return results[0]
+
+    def face_crop(self, image):
+        box = self.locator.locate(image)
+        if box is None:
+            return None
+        return cv2.resize(self.locator.crop(image, box), (256, 256))
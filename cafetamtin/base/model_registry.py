@@ -0,0 +1,122 @@
+# Copyright (C) 2023 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import cv2
+import time
+import logging
+import numpy as np
+from threading import Lock
+
+BACKENDS = {
+    'default': 'DNN_BACKEND_DEFAULT',
+    'opencv': 'DNN_BACKEND_OPENCV',
+    'openvino': 'DNN_BACKEND_INFERENCE_ENGINE',
+    'cuda': 'DNN_BACKEND_CUDA',
+    'vulkan': 'DNN_BACKEND_VKCOM',
+    'timvx': 'DNN_BACKEND_TIMVX',
+}
+
+TARGETS = {
+    'cpu': 'DNN_TARGET_CPU',
+    'opencl': 'DNN_TARGET_OPENCL',
+    'opencl_fp16': 'DNN_TARGET_OPENCL_FP16',
+    'myriad': 'DNN_TARGET_MYRIAD',
+    'cuda': 'DNN_TARGET_CUDA',
+    'cuda_fp16': 'DNN_TARGET_CUDA_FP16',
+    'vulkan': 'DNN_TARGET_VULKAN',
+    'npu': 'DNN_TARGET_NPU',
+}
+
+def resolve(options, name):
+    if not name:
+        return None
+    if name not in options or not hasattr(cv2.dnn, options[name]):
+        raise ValueError(f'Opção de DNN não suportada: {name}')
+    return getattr(cv2.dnn, options[name])
+
+def read_net(weight, config = None):
+    if weight.endswith('.onnx'):
+        return cv2.dnn.readNetFromONNX(weight)
+    return cv2.dnn.readNet(weight, config)
+
+class Model:
+
+    def __init__(self, key, net, load_time):
+        self.key = key
+        self.net = net
+        self.lock = Lock()
+        self.load_time = load_time
+        self.warmup_time = None
+        self.reuses = 0
+        self.output_layers = self.__get_output_layers()
+
+    def __get_output_layers(self):
+        layer_names = self.net.getLayerNames()
+        return [layer_names[i - 1] for i in self.net.getUnconnectedOutLayers()]
+
+    def warm_up(self, width = 416, height = 416, channels = 1):
+        st = time.time()
+        image = np.zeros((height, width, channels), dtype=np.uint8)
+        blob = cv2.dnn.blobFromImage(image, 1/255, (width, height), (0, 0, 0), True, crop=False)
+        with self.lock:
+            self.net.setInput(blob)
+            self.net.forward(self.output_layers)
+        self.warmup_time = time.time() - st
+        logging.info(f'|ModelRegistry|WARMUP[{self.key}]:TIME[{self.warmup_time:.3f}]')
+
+class ModelRegistry:
+    __models = {}
+    __lock = Lock()
+
+    @classmethod
+    def get(cls, weight, config = None, backend = None, target = None, threads = 0):
+        if threads:
+            cv2.setNumThreads(threads)
+
+        key = (weight, config, backend, target)
+        with cls.__lock:
+            model = cls.__models.get(key)
+            if model is None:
+                st = time.time()
+                net = read_net(weight, config)
+                if backend:
+                    net.setPreferableBackend(resolve(BACKENDS, backend))
+                if target:
+                    net.setPreferableTarget(resolve(TARGETS, target))
+                model = Model(key, net, time.time() - st)
+                cls.__models[key] = model
+                logging.info(f'|ModelRegistry|LOAD[{key}]:TIME[{model.load_time:.3f}]')
+            else:
+                model.reuses += 1
+        return model
+
+    @classmethod
+    def stats(cls):
+        with cls.__lock:
+            return {
+                key: {
+                    'load_time': model.load_time,
+                    'warmup_time': model.warmup_time,
+                    'reuses': model.reuses
+                }
+                for key, model in cls.__models.items()
+            }
+
+    @classmethod
+    def clear(cls):
+        with cls.__lock:
+            cls.__models.clear()
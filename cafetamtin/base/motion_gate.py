@@ -0,0 +1,97 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import cv2
+import numpy as np
+from threading import Lock
+
+class MotionGate:
+    STATIC = 'static'
+    PARTIAL = 'partial'
+    FULL = 'full'
+
+    def __init__(self, scale = 0.125, threshold = 25, min_ratio = 0.002, max_ratio = 0.4):
+        self.scale = scale
+        self.threshold = threshold
+        self.min_ratio = min_ratio
+        self.max_ratio = max_ratio
+        self.previous = None
+        self.offset = None
+        self.positions = None
+        self.hits = 0
+        self.partials = 0
+        self.misses = 0
+        self.lock = Lock()
+
+    def reset(self):
+        with self.lock:
+            self.previous = None
+            self.offset = None
+            self.positions = None
+
+    def downscale(self, image):
+        return cv2.resize(image, None, fx=self.scale, fy=self.scale, interpolation=cv2.INTER_AREA)
+
+    def check(self, image, offset, margin = 0):
+        with self.lock:
+            return self.__check(image, offset, margin)
+
+    def __check(self, image, offset, margin):
+        small = self.downscale(image)
+        if self.previous is None or self.previous.shape != small.shape or self.offset != tuple(offset):
+            self.misses += 1
+            return MotionGate.FULL, None
+
+        mask = cv2.absdiff(small, self.previous) > self.threshold
+        ratio = mask.mean()
+        if ratio < self.min_ratio:
+            self.hits += 1
+            return MotionGate.STATIC, None
+
+        lines, columns = np.nonzero(mask)
+        height, width = image.shape[:2]
+        x0 = max(int(columns.min() / self.scale) - margin, 0)
+        y0 = max(int(lines.min() / self.scale) - margin, 0)
+        x1 = min(int((columns.max() + 1) / self.scale) + margin, width)
+        y1 = min(int((lines.max() + 1) / self.scale) + margin, height)
+
+        if ratio > self.max_ratio or (x1 - x0) * (y1 - y0) > self.max_ratio * width * height:
+            self.misses += 1
+            return MotionGate.FULL, None
+
+        self.partials += 1
+        return MotionGate.PARTIAL, (x0, y0, x1 - x0, y1 - y0)
+
+    def update(self, image, offset, positions):
+        small = self.downscale(image)
+        with self.lock:
+            self.previous = small
+            self.offset = tuple(offset)
+            self.positions = dict(positions)
+
+    def cached_positions(self):
+        with self.lock:
+            return dict(self.positions or {})
+
+    def stats(self):
+        total = self.hits + self.partials + self.misses
+        return {
+            'hits': self.hits,
+            'partials': self.partials,
+            'misses': self.misses,
+            'saved': self.hits / total if total else 0
+        }
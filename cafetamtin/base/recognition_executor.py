@@ -0,0 +1,59 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+recognizer = None
+
+def init_worker():
+    global recognizer
+    from base.recognizer import Recognizer
+    recognizer = Recognizer(None)
+    recognizer.warm_up()
+
+def recognize(images, limits, offset, region = None):
+    if recognizer is None:
+        init_worker()
+    if region is not None:
+        return [recognizer.detect_region(image, region, limits, offset) for image in images]
+    return recognizer.detect_batch(images, limits, offset)
+
+class RecognitionExecutor:
+
+    def __init__(self, workers = 1):
+        self.workers = workers
+        if workers > 0:
+            self.executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn'),
+                initializer=init_worker
+            )
+        else:
+            self.executor = ThreadPoolExecutor(max_workers=1)
+        logging.info(f'|RecognitionExecutor|WORKERS[{workers}]')
+
+    def submit(self, images, limits = None, offset = (0, 0), region = None):
+        return self.executor.submit(recognize, images, limits, tuple(offset), region)
+
+    def warm_up(self):
+        for i in range(max(self.workers, 1)):
+            self.submit([])
+
+    def shutdown(self):
+        self.executor.shutdown(wait=False, cancel_futures=True)
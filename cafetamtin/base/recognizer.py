@@ -15,125 +15,255 @@
 # You should have received a copy of the GNU General Public License
 # along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
 
-from asyncore import read
+import os
 import cv2
+import logging
 import numpy as np
 import imutils
 
+from base.motion_gate import MotionGate
+from base.model_registry import ModelRegistry
+from utils.debug_writer import DebugWriter
+
+DARKNET_WEIGHTS = '../data/yolov4-tiny/training/yolov4-tiny-custom_best.weights'
+
+def letterbox(image, size):
+    height, width = image.shape[:2]
+    scale = min(size / width, size / height)
+    new_width, new_height = int(round(width * scale)), int(round(height * scale))
+    resized = cv2.resize(image, (new_width, new_height), interpolation=cv2.INTER_AREA)
+    pad_x, pad_y = (size - new_width) // 2, (size - new_height) // 2
+    canvas = np.zeros((size, size) + image.shape[2:], dtype=image.dtype)
+    canvas[pad_y:pad_y+new_height, pad_x:pad_x+new_width] = resized
+    return canvas, scale, (pad_x, pad_y)
+
+def decode_detections(outs, width, height, limits = None, score_threshold = 0.6, conf_threshold = 0.5, nms_threshold = 0.4, scale = 1, pad = (0, 0), offset = (0, 0)):
+    detections = np.vstack([out.reshape(-1, out.shape[-1]) for out in outs])
+    scores = detections[:, 5:]
+    class_ids = np.argmax(scores, axis=1)
+    confidences = scores[np.arange(len(scores)), class_ids]
+    mask = confidences > score_threshold
+
+    centers = ((detections[:, 0:2] * (width, height) - pad) / scale + offset).astype(int)
+    if limits is not None:
+        x0, y0, x1, y1 = limits
+        mask &= (centers[:, 0] >= x0) & (centers[:, 0] <= x1) & (centers[:, 1] >= y0) & (centers[:, 1] <= y1)
+
+    centers = centers[mask]
+    sizes = (detections[mask, 2:4] * (width, height) / scale).astype(int)
+    corners = (centers - sizes / 2).astype(int)
+    boxes = np.hstack((corners, sizes))
+    confidences = confidences[mask].astype(float)
+    class_ids = class_ids[mask]
+
+    if len(boxes) == 0:
+        return boxes, centers, confidences, class_ids
+
+    indices = cv2.dnn.NMSBoxes(boxes.tolist(), confidences.tolist(), conf_threshold, nms_threshold)
+    indices = np.array(indices, dtype=int).flatten()
+    return boxes[indices], centers[indices], confidences[indices], class_ids[indices]
+
 class Recognizer:
 
-    def __init__(self, board):
+    def __init__(self, board, model = None, backend = None, target = None, threads = None):
         self.yolo_labels = '../data/yolov4-tiny/obj.names'
-        self.yolo_weight = '../data/yolov4-tiny/training/yolov4-tiny-custom_best.weights'
+        self.yolo_weight = model or os.getenv('RECOGNIZER_MODEL') or DARKNET_WEIGHTS
         self.yolo_config = '../data/yolov4-tiny/yolov4-tiny-custom.cfg'
-        self.net = cv2.dnn.readNet(self.yolo_weight, self.yolo_config)
+        self.backend = backend if backend is not None else os.getenv('RECOGNIZER_BACKEND', '')
+        self.target = target if target is not None else os.getenv('RECOGNIZER_TARGET', '')
+        self.threads = threads if threads is not None else int(os.getenv('RECOGNIZER_THREADS', 0))
+        self.model = ModelRegistry.get(self.yolo_weight, self.yolo_config, self.backend, self.target, self.threads)
+        self.net = self.model.net
         self.board = board
+        self.input_size = int(os.getenv('RECOGNIZER_INPUT_SIZE', 416))
+        self.motion_gate = MotionGate() if int(os.getenv('RECOGNIZER_MOTION_GATE', 0)) else None
         self.classes = []
-        self.colors = []
+        self.color = (0, 0, 255)
 
         self.load_classes()
-        self.load_colors()
 
     def load_classes(self):
         with open(self.yolo_labels, 'r') as f:
             self.classes = [line.strip() for line in f.readlines()]
-
-    def load_colors(self):
-        self.colors = np.random.uniform(0, 255, size=(len(self.classes), 3))
     
     #separar
     def take_picture(self):
         return self.board.camera.take_picture()
     
     def get_output_layers(self):
-        layer_names = self.net.getLayerNames()
-        output_layers = [layer_names[i - 1] for i in self.net.getUnconnectedOutLayers()]
-        return output_layers
+        return self.model.output_layers
+
+    def warm_up(self, width = 640, height = 480):
+        if self.input_size:
+            width, height = self.input_size, self.input_size
+        self.model.warm_up(width, height)
 
     def draw_prediction(self, img, class_id, confidence, x, y, x_plus_w, y_plus_h):
         label = str(self.classes[class_id])
-        self.load_colors()
-        #color = self.colors[class_id]
-        color = (0, 0, 255)
-        cv2.rectangle(img, (x,y), (x_plus_w,y_plus_h), color, 2)
-        cv2.putText(img, label, (x-10,y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, color, 2)
+        cv2.rectangle(img, (x,y), (x_plus_w,y_plus_h), self.color, 2)
+        cv2.putText(img, label, (x-10,y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.5, self.color, 2)
+
+    def draw_predictions(self, img, positions, offset = (0, 0)):
+        if not DebugWriter.enabled():
+            return
+        img = img.copy()
+        for label, position in positions.items():
+            if label == 'board':
+                continue
+            x, y = position['x'] - offset[0], position['y'] - offset[1]
+            self.draw_prediction(img, self.classes.index(label), position['confidence'], x, y, x+position['w'], y+position['h'])
+        DebugWriter.write('object-detection', img, copy=False)
     
-    def inside_limits(self, x, y):
-        
+    def limits(self):
+        if self.board is None:
+            return None
         if not self.board.top_left[0] or not self.board.top_right[0] or not self.board.bottom_left[0] or not self.board.bottom_right[0]:
-            return False
-        if x >= self.board.top_left[0] and x <= self.board.top_right[0] and y >= self.board.top_left[1] and y <= self.board.bottom_right[1]:
-            return True
-        return False
+            return None
+        return (self.board.top_left[0], self.board.top_left[1], self.board.top_right[0], self.board.bottom_right[1])
+
+    def get_positions(self, image, draw_box = False, offset = (0, 0)):
+        limits = self.limits()
+        if self.board is not None and self.board.configuration_mode:
+            limits = None
+        elif self.board is not None and limits is None:
+            return {}
+
+        if self.motion_gate is not None and limits is not None:
+            positions = self.gated_detect(image, limits, offset)
+        else:
+            positions = self.detect(image, limits, offset)
+
+        if draw_box:
+            self.draw_predictions(image, positions, offset)
+
+        return positions
+
+    def detect(self, image, limits = None, offset = (0, 0)):
+        canvas, size, scale, pad = self.prepare_input(image)
+        blob = cv2.dnn.blobFromImage(canvas, 1/255, size, (0, 0, 0), True, crop=False)
+        with self.model.lock:
+            self.net.setInput(blob)
+            outs = self.net.forward(self.get_output_layers())
+        return self.decode(outs, size[0], size[1], limits, scale, pad, offset)
+
+    def get_positions_batch(self, images, draw_box = False, offset = (0, 0)):
+        limits = self.limits()
+        if self.board is not None and self.board.configuration_mode:
+            limits = None
+        elif self.board is not None and limits is None:
+            return [{} for image in images]
+
+        positions = self.detect_batch(images, limits, offset)
+
+        if draw_box and len(images) > 0:
+            self.draw_predictions(images[-1], positions[-1], offset)
 
-    def get_positions(self, image, draw_box = False):
+        return positions
+
+    def detect_batch(self, images, limits = None, offset = (0, 0)):
+        if len(images) == 0:
+            return []
+        if len(images) == 1:
+            return [self.detect(images[0], limits, offset)]
+
+        inputs = [self.prepare_input(image) for image in images]
+        canvases = [canvas for canvas, size, scale, pad in inputs]
+        blob = cv2.dnn.blobFromImages(canvases, 1/255, inputs[0][1], (0, 0, 0), True, crop=False)
+        with self.model.lock:
+            self.net.setInput(blob)
+            outs = self.net.forward(self.get_output_layers())
+
+        outs = [self.split_batch(out, len(images)) for out in outs]
+        positions = []
+        for i, (canvas, size, scale, pad) in enumerate(inputs):
+            positions.append(self.decode([out[i] for out in outs], size[0], size[1], limits, scale, pad, offset))
+        return positions
+
+    @staticmethod
+    def split_batch(out, count):
+        if out.ndim == 3 and out.shape[0] == count:
+            return list(out)
+        return np.split(out.reshape(-1, out.shape[-1]), count)
+
+    def gate_check(self, image, offset = (0, 0)):
+        margin = int(max(self.board.block_width or 0, self.board.block_height or 0))
+        return self.motion_gate.check(image, offset, margin)
+
+    def gate_update(self, decision, image, offset, positions):
+        if decision != MotionGate.STATIC:
+            self.motion_gate.update(image, offset, positions)
+        logging.info(f'|MotionGate|{decision.upper()}|STATS[{self.motion_gate.stats()}]')
+
+    def gated_detect(self, image, limits, offset):
+        decision, region = self.gate_check(image, offset)
+
+        if decision == MotionGate.STATIC:
+            positions = self.motion_gate.cached_positions()
+        elif decision == MotionGate.PARTIAL:
+            positions = self.outside_region(region, offset)
+            positions.update(self.detect_region(image, region, limits, offset))
+        else:
+            positions = self.detect(image, limits, offset)
+
+        self.gate_update(decision, image, offset, positions)
+        return positions
+
+    def outside_region(self, region, offset = (0, 0)):
+        x, y, w, h = region
+        x0, y0 = x + offset[0], y + offset[1]
+        return {
+            key: value for key, value in self.motion_gate.cached_positions().items()
+            if not (x0 <= value['center_x'] < x0 + w and y0 <= value['center_y'] < y0 + h)
+        }
+
+    def detect_region(self, image, region, limits = None, offset = (0, 0)):
+        canvas, size, scale, pad = self.prepare_region(image, region)
+        blob = cv2.dnn.blobFromImage(canvas, 1/255, size, (0, 0, 0), True, crop=False)
+        with self.model.lock:
+            self.net.setInput(blob)
+            outs = self.net.forward(self.get_output_layers())
+        return self.decode(outs, size[0], size[1], limits, scale, pad, offset)
+
+    def prepare_region(self, image, region):
+        x, y, w, h = region
+        if self.yolo_weight.endswith('.onnx'):
+            canvas = np.zeros_like(image)
+            canvas[y:y+h, x:x+w] = image[y:y+h, x:x+w]
+            return self.prepare_input(canvas)
+
+        crop = image[y:y+h, x:x+w]
+        height, width = image.shape[:2]
+        scale = min(self.input_size / width, self.input_size / height) if self.input_size else 1
+        if scale != 1:
+            crop = cv2.resize(crop, (max(int(round(w * scale)), 1), max(int(round(h * scale)), 1)), interpolation=cv2.INTER_AREA)
+
+        stride = 32
+        size = (-(-crop.shape[1] // stride) * stride, -(-crop.shape[0] // stride) * stride)
+        canvas = np.zeros((size[1], size[0]) + crop.shape[2:], dtype=crop.dtype)
+        canvas[:crop.shape[0], :crop.shape[1]] = crop
+        return canvas, size, scale, (-x * scale, -y * scale)
+
+    def prepare_input(self, image):
+        if not self.input_size:
+            height, width = image.shape[:2]
+            return image, (width, height), 1, (0, 0)
+
+        canvas, scale, pad = letterbox(image, self.input_size)
+        return canvas, (self.input_size, self.input_size), scale, pad
+
+    def decode(self, outs, width, height, limits = None, scale = 1, pad = (0, 0), offset = (0, 0)):
         positions = {}
+        boxes, centers, confidences, class_ids = decode_detections(outs, width, height, limits, scale=scale, pad=pad, offset=offset)
 
-        #height, width, channels = image.shape
-        height, width = image.shape
-        blob = cv2.dnn.blobFromImage(image, 1/255, (width, height),(0, 0, 0), True, crop=False)
-        self.net.setInput(blob)
-        outs = self.net.forward(self.get_output_layers())
-
-        class_ids = []
-        confidences = []
-        boxes = []
-        centers = []
-        conf_threshold = 0.5
-        nms_threshold = 0.4
-
-        for out in outs:
-            for detection in out:
-                scores = detection[5:]
-                class_id = np.argmax(scores)
-                confidence = scores[class_id]
-                if confidence > 0.6:
-                    # Extract values to draw bounding box
-                    center_x = int(detection[0] * width)
-                    center_y = int(detection[1] * height)
-                    if self.inside_limits(center_x, center_y) or self.board.configuration_mode:
-                        #print("cf: ", self.board.configuration_mode, center_x, center_y)
-                        centers.append([center_x, center_y])
-                        w = int(detection[2] * width)
-                        h = int(detection[3] * height)
-                        # Rectangle coordinates
-                        x = int(center_x - w / 2)
-                        y = int(center_y - h / 2)
-                        boxes.append([x, y, w, h])
-                        confidences.append(float(confidence))
-                        class_ids.append(class_id)
-
-                        #print('center: x:{}, y:{} = Number: {}, confidence: {}'.format(center_x, center_y, self.classes[class_id], confidence))
-                        self.draw_prediction(image, class_id, confidence, round(x), round(y), round(x+w), round(y+h))
-                        #cv2.imwrite("temp/object-detection.jpg", image)
-
-        #print(boxes)
-        indices = cv2.dnn.NMSBoxes(boxes, confidences, conf_threshold, nms_threshold)
-        #print('indices: ', indices)
-        #print('boxes:', boxes)
-        #print('centers:', centers)
-
-        for i in indices:
-            #i = i[0]
-            #print(i)
-            box = boxes[i]
-            x = box[0]
-            y = box[1]
-            w = box[2]
-            h = box[3]
-            positions[self.classes[class_ids[i]]] = {
-                'confidence': confidences[i],
-                'x': round(x),
-                'y': round(y),
-                'w': round(w),
-                'h': round(h),
-                'center_x': round(centers[i][0]),
-                'center_y': round(centers[i][1])
+        for box, center, confidence, class_id in zip(boxes, centers, confidences, class_ids):
+            positions[self.classes[class_id]] = {
+                'confidence': float(confidence),
+                'x': int(box[0]),
+                'y': int(box[1]),
+                'w': int(box[2]),
+                'h': int(box[3]),
+                'center_x': int(center[0]),
+                'center_y': int(center[1])
             }
 
-            if draw_box:
-                if (self.classes[class_ids[i]] != 'board'):
-                    self.draw_prediction(image, class_ids[i], confidences[i], round(x), round(y), round(x+w), round(y+h))
-                    cv2.imwrite("temp/object-detection.jpg", image)
-
         return positions
\ No newline at end of file
@@ -0,0 +1,188 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Builds an int8 EmoNet and ships it only when it stays within the
+# configured accuracy deltas of the float model on AffectNet.
+#
+#   python -m benchmarks.emonet_quantization -r ~/affectnet -c 32 -e qnnpack
+#   python -m benchmarks.emonet_quantization -r ~/affectnet -m dynamic
+#
+# static (the default) quantizes the whole network with FX graph mode,
+# calibrated on AffectNet samples of the calibration subset. dynamic only
+# quantizes the linear head (emo_fc_2); the convolutional and hourglass
+# stack stays float, so it gives almost no speedup. Both models are evaluated with
+# emonet.evaluation.evaluate (ACC, CCC, RMSE). The accepted model is
+# saved as TorchScript in data/affectnet/emonet_8_int8.pt, which Facial
+# loads with EMONET_VARIANT = int8.
+
+import sys
+import json
+import getopt
+import torch
+from torch import nn
+from torch.utils.data import DataLoader, Subset
+from torchvision import transforms
+
+from emonet.data import AffectNet
+from emonet.data_augmentation import DataAugmentor
+from emonet.evaluation import evaluate
+from emonet.metrics import ACC, CCC, RMSE
+from base.emonet_runtime import load_emonet, quantized_path
+
+class EmoNetInference(nn.Module):
+
+    def __init__(self, net):
+        super().__init__()
+        self.net = net
+
+    def forward(self, x):
+        return self.net(x)
+
+def load_dataset(root, subset, n_expression):
+    return AffectNet(
+        root_path=root,
+        subset=subset,
+        transform_image_shape=DataAugmentor(256, 256),
+        transform_image=transforms.Compose([transforms.ToTensor()]),
+        n_expression=n_expression,
+        verbose=0
+    )
+
+def measure(net, loader):
+    valence, arousal, expression = evaluate(
+        net, loader, 'cpu',
+        metrics_valence_arousal={'CCC': CCC, 'RMSE': RMSE},
+        metrics_expression={'ACC': ACC},
+        verbose=False
+    )
+    net.train(False)
+    return {
+        'ACC': float(expression['ACC']),
+        'valence_CCC': float(valence['CCC']),
+        'valence_RMSE': float(valence['RMSE']),
+        'arousal_CCC': float(arousal['CCC']),
+        'arousal_RMSE': float(arousal['RMSE'])
+    }
+
+def quantize_dynamic(net):
+    return torch.ao.quantization.quantize_dynamic(net, {nn.Linear}, dtype=torch.qint8)
+
+def quantize_static(net, loader, batches, engine):
+    from torch.ao.quantization import get_default_qconfig_mapping
+    from torch.ao.quantization.quantize_fx import prepare_fx, convert_fx
+
+    torch.backends.quantized.engine = engine
+    example = torch.zeros(1, 3, 256, 256)
+    prepared = prepare_fx(EmoNetInference(net), get_default_qconfig_mapping(engine), example_inputs=(example,))
+    with torch.inference_mode():
+        for index, data in enumerate(loader):
+            if index >= batches:
+                break
+            prepared(data['image'])
+    return convert_fx(prepared)
+
+def delta_failures(reference, candidate, max_acc_drop, max_ccc_drop, max_rmse_increase):
+    failures = []
+    if reference['ACC'] - candidate['ACC'] > max_acc_drop:
+        failures.append('ACC')
+    for key in ('valence_CCC', 'arousal_CCC'):
+        if reference[key] - candidate[key] > max_ccc_drop:
+            failures.append(key)
+    for key in ('valence_RMSE', 'arousal_RMSE'):
+        if candidate[key] - reference[key] > max_rmse_increase:
+            failures.append(key)
+    return failures
+
+def main(argv):
+    root = None
+    mode = 'static'
+    subset = 'test'
+    calibration_subset = 'train'
+    calibration_batches = 32
+    batch_size = 32
+    engine = 'qnnpack'
+    n_expression = 8
+    max_acc_drop = 0.01
+    max_ccc_drop = 0.02
+    max_rmse_increase = 0.02
+
+    opts, args = getopt.getopt(argv[1:], 'r:m:s:k:c:b:e:', [
+        'root=', 'mode=', 'subset=', 'calibration-subset=', 'calibration-batches=', 'batch-size=', 'engine=',
+        'max-acc-drop=', 'max-ccc-drop=', 'max-rmse-increase='
+    ])
+    for opt, arg in opts:
+        if opt in ('-r', '--root'):
+            root = arg
+        elif opt in ('-m', '--mode'):
+            mode = arg
+        elif opt in ('-s', '--subset'):
+            subset = arg
+        elif opt in ('-k', '--calibration-subset'):
+            calibration_subset = arg
+        elif opt in ('-c', '--calibration-batches'):
+            calibration_batches = int(arg)
+        elif opt in ('-b', '--batch-size'):
+            batch_size = int(arg)
+        elif opt in ('-e', '--engine'):
+            engine = arg
+        elif opt == '--max-acc-drop':
+            max_acc_drop = float(arg)
+        elif opt == '--max-ccc-drop':
+            max_ccc_drop = float(arg)
+        elif opt == '--max-rmse-increase':
+            max_rmse_increase = float(arg)
+
+    if root is None:
+        print('Usage: python -m benchmarks.emonet_quantization -r <affectnet root> [-m static|dynamic]')
+        return 2
+
+    loader = DataLoader(load_dataset(root, subset, n_expression), batch_size=batch_size, shuffle=False)
+    net = load_emonet(n_expression)
+    reference = measure(net, loader)
+
+    if mode == 'static':
+        calibration = load_dataset(root, calibration_subset, n_expression)
+        calibration = Subset(calibration, range(min(len(calibration), calibration_batches * batch_size)))
+        quantized = quantize_static(net, DataLoader(calibration, batch_size=batch_size, shuffle=True), calibration_batches, engine)
+    else:
+        print('dynamic mode quantizes only the linear head (emo_fc_2); convolutions stay float')
+        torch.backends.quantized.engine = engine
+        quantized = quantize_dynamic(net)
+
+    candidate = measure(quantized, loader)
+    failures = delta_failures(reference, candidate, max_acc_drop, max_ccc_drop, max_rmse_increase)
+
+    print(f'{"metric":<14} {"float":>8} {"int8":>8}')
+    for key in reference:
+        print(f'{key:<14} {reference[key]:8.4f} {candidate[key]:8.4f}')
+
+    if failures:
+        print(f'Rejected: {", ".join(failures)} outside the configured deltas')
+        return 1
+
+    path = quantized_path(n_expression)
+    with torch.inference_mode():
+        scripted = torch.jit.freeze(torch.jit.trace(quantized, torch.zeros(1, 3, 256, 256), strict=False))
+    torch.jit.save(scripted, str(path))
+    with open(path.with_suffix('.json'), 'w') as f:
+        json.dump({'mode': mode, 'engine': engine, 'float': reference, 'int8': candidate}, f, indent=2)
+    print(f'Saved {path}')
+    return 0
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv))
@@ -0,0 +1,108 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Per-crop latency of the optimized EmoNet runtime (traced and frozen,
+# inference mode, channels-last, capped threads) against the eager model
+# used before, and numeric parity of expression, valence and arousal.
+#
+#   python -m benchmarks.emonet_runtime -f ../data/faces -n 20 -t 2
+#
+# Crops are resized to 256x256; without a folder random crops are used.
+
+import os
+import sys
+import glob
+import time
+import getopt
+import cv2
+import torch
+import numpy as np
+from torchvision import transforms
+
+from base.emonet_runtime import EmoNetRuntime, load_emonet
+
+def load_crops(folder, count):
+    transform = transforms.Compose([transforms.ToTensor()])
+    paths = sorted(glob.glob(os.path.join(folder, '*.jpg')) + glob.glob(os.path.join(folder, '*.png'))) if folder else []
+    if len(paths) == 0:
+        return [torch.rand(1, 3, 256, 256) for i in range(count)]
+    return [transform(cv2.resize(cv2.imread(path), (256, 256))).unsqueeze(0) for path in paths]
+
+def run_eager(net, crops, repetitions):
+    outputs, times = [], []
+    for crop in crops:
+        for i in range(repetitions):
+            st = time.perf_counter()
+            with torch.no_grad():
+                out = net(crop)
+            times.append(time.perf_counter() - st)
+        outputs.append(out)
+    return outputs, np.array(times) * 1000
+
+def run_runtime(runtime, crops, repetitions):
+    outputs, times = [], []
+    for crop in crops:
+        for i in range(repetitions):
+            st = time.perf_counter()
+            out = runtime(crop)
+            times.append(time.perf_counter() - st)
+        outputs.append(out)
+    return outputs, np.array(times) * 1000
+
+def parity(reference, outputs):
+    expression = np.mean([int(r['expression'].argmax()) == int(o['expression'].argmax()) for r, o in zip(reference, outputs)])
+    valence = max(float((r['valence'] - o['valence']).abs().max()) for r, o in zip(reference, outputs))
+    arousal = max(float((r['arousal'] - o['arousal']).abs().max()) for r, o in zip(reference, outputs))
+    return expression, valence, arousal
+
+def main(argv):
+    folder = None
+    count = 10
+    repetitions = 5
+    threads = 2
+
+    opts, args = getopt.getopt(argv[1:], 'f:c:n:t:', ['folder=', 'count=', 'repetitions=', 'threads='])
+    for opt, arg in opts:
+        if opt in ('-f', '--folder'):
+            folder = arg
+        elif opt in ('-c', '--count'):
+            count = int(arg)
+        elif opt in ('-n', '--repetitions'):
+            repetitions = int(arg)
+        elif opt in ('-t', '--threads'):
+            threads = int(arg)
+
+    crops = load_crops(folder, count)
+    eager = load_emonet()
+    with torch.no_grad():
+        eager(crops[0])
+    reference, eager_times = run_eager(eager, crops, repetitions)
+
+    runtime = EmoNetRuntime(load_emonet(), threads=threads)
+    runtime.warm_up()
+    outputs, runtime_times = run_runtime(runtime, crops, repetitions)
+    expression, valence, arousal = parity(reference, outputs)
+
+    print(f'crops: {len(crops)}, repetitions: {repetitions}, threads: {torch.get_num_threads()}, scripted: {runtime.scripted}')
+    print(f'{"path":<10} {"p50 ms":>9} {"p95 ms":>9}')
+    print(f'{"eager":<10} {np.percentile(eager_times, 50):9.2f} {np.percentile(eager_times, 95):9.2f}')
+    print(f'{"runtime":<10} {np.percentile(runtime_times, 50):9.2f} {np.percentile(runtime_times, 95):9.2f}')
+    print(f'expression agreement: {expression:.0%}, max |valence diff|: {valence:.2e}, max |arousal diff|: {arousal:.2e}')
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -0,0 +1,104 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Latency and detection parity of recognizer variants (model file, DNN
+# backend, target and thread count) against the darknet weights on the
+# default backend, measured on a folder of saved board images.
+#
+#   python -m benchmarks.recognizer_backends -f ../data/boards \
+#       -c ::cpu:4,../data/yolov4-tiny/yolov4-tiny-custom-int8.onnx:opencv:cpu:4
+#
+# Each configuration is model:backend:target:threads; an empty model is
+# the darknet weights and the other empty fields keep the DNN defaults.
+# RECOGNIZER_MODEL is ignored so the reference is always darknet. Exported ONNX models must keep the darknet
+# output layout (cx, cy, w, h, objectness, class scores).
+
+import sys
+import cv2
+import time
+import getopt
+import numpy as np
+
+from base.recognizer import Recognizer, DARKNET_WEIGHTS
+from benchmarks.recognizer_input_size import load_images, same_reading
+
+def parse_configuration(text):
+    fields = (text.split(':') + ['', '', '', ''])[:4]
+    model, backend, target, threads = fields
+    return model or DARKNET_WEIGHTS, backend, target, int(threads or 0)
+
+def read_blocks(recognizer, images, repetitions):
+    recognizer.warm_up()
+    readings = []
+    times = []
+    for path, image in images:
+        for i in range(repetitions):
+            st = time.perf_counter()
+            positions = recognizer.detect(image)
+            times.append(time.perf_counter() - st)
+        readings.append(positions)
+    return readings, np.array(times) * 1000
+
+def main(argv):
+    folder = 'temp'
+    configurations = []
+    repetitions = 5
+    tolerance = 10
+    process = False
+
+    opts, args = getopt.getopt(argv[1:], 'f:c:n:t:p', ['folder=', 'configurations=', 'repetitions=', 'tolerance=', 'process'])
+    for opt, arg in opts:
+        if opt in ('-f', '--folder'):
+            folder = arg
+        elif opt in ('-c', '--configurations'):
+            configurations = [parse_configuration(v) for v in arg.split(',')]
+        elif opt in ('-n', '--repetitions'):
+            repetitions = int(arg)
+        elif opt in ('-t', '--tolerance'):
+            tolerance = int(arg)
+        elif opt in ('-p', '--process'):
+            process = True
+
+    images = load_images(folder, process)
+    if len(images) == 0:
+        print(f'No images found in {folder}')
+        return
+
+    default_threads = cv2.getNumThreads()
+    cv2.setNumThreads(default_threads)
+    reference, reference_times = read_blocks(Recognizer(None, DARKNET_WEIGHTS, '', '', 0), images, repetitions)
+
+    print(f'images: {len(images)}, repetitions: {repetitions}')
+    print(f'{"configuration":<50} {"mean ms":>9} {"p95 ms":>9} {"agree":>7} {"9 blocks":>9}')
+    print(f'{"darknet (reference)":<50} {reference_times.mean():9.2f} {np.percentile(reference_times, 95):9.2f} {"-":>7} {sum(len(r) == 9 for r in reference):>9}')
+
+    for model, backend, target, threads in configurations:
+        name = f'{"darknet" if model == DARKNET_WEIGHTS else model}:{backend or "default"}:{target or "default"}:{threads}'
+        try:
+            cv2.setNumThreads(threads or default_threads)
+            recognizer = Recognizer(None, model, backend, target, threads)
+            readings, times = read_blocks(recognizer, images, repetitions)
+        except Exception as e:
+            print(f'{name:<50} failed: {e}')
+            continue
+        agreement = np.mean([same_reading(r, ref, tolerance) for r, ref in zip(readings, reference)])
+        nine_blocks = sum(len(r) == 9 for r in readings)
+        print(f'{name:<50} {times.mean():9.2f} {np.percentile(times, 95):9.2f} {agreement:7.0%} {nine_blocks:>9}')
+
+if __name__ == '__main__':
+    main(sys.argv)
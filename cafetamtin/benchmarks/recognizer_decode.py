@@ -0,0 +1,132 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Microbenchmark of the YOLO output decoding in Recognizer.
+#
+# Record the raw network outputs of a processed board image once:
+#   python -m benchmarks.recognizer_decode -i temp/black.jpg -o temp/outs.npz
+# Then compare the vectorized decoding with the former per-row loop:
+#   python -m benchmarks.recognizer_decode -o temp/outs.npz -n 200
+
+import sys
+import time
+import getopt
+import cv2
+import numpy as np
+
+from base.model_registry import ModelRegistry
+from base.recognizer import decode_detections
+
+YOLO_LABELS = '../data/yolov4-tiny/obj.names'
+YOLO_WEIGHT = '../data/yolov4-tiny/training/yolov4-tiny-custom_best.weights'
+YOLO_CONFIG = '../data/yolov4-tiny/yolov4-tiny-custom.cfg'
+
+def record_outputs(image_path, outputs_path):
+    image = cv2.imread(image_path, cv2.IMREAD_GRAYSCALE)
+    height, width = image.shape[:2]
+    model = ModelRegistry.get(YOLO_WEIGHT, YOLO_CONFIG)
+    blob = cv2.dnn.blobFromImage(image, 1/255, (width, height), (0, 0, 0), True, crop=False)
+    model.net.setInput(blob)
+    outs = model.net.forward(model.output_layers)
+    np.savez(outputs_path, width=width, height=height, **{f'out{i}': out for i, out in enumerate(outs)})
+
+def load_outputs(outputs_path):
+    data = np.load(outputs_path)
+    keys = sorted([k for k in data.files if k.startswith('out')], key=lambda k: int(k[3:]))
+    return [data[k] for k in keys], int(data['width']), int(data['height'])
+
+def legacy_decode(outs, width, height, limits, n_classes):
+    image = np.zeros((height, width), dtype=np.uint8)
+    class_ids = []
+    confidences = []
+    boxes = []
+    centers = []
+
+    for out in outs:
+        for detection in out:
+            scores = detection[5:]
+            class_id = np.argmax(scores)
+            confidence = scores[class_id]
+            if confidence > 0.6:
+                center_x = int(detection[0] * width)
+                center_y = int(detection[1] * height)
+                if limits is None or (center_x >= limits[0] and center_x <= limits[2] and center_y >= limits[1] and center_y <= limits[3]):
+                    centers.append([center_x, center_y])
+                    w = int(detection[2] * width)
+                    h = int(detection[3] * height)
+                    x = int(center_x - w / 2)
+                    y = int(center_y - h / 2)
+                    boxes.append([x, y, w, h])
+                    confidences.append(float(confidence))
+                    class_ids.append(class_id)
+                    # draw_prediction regenerated the color table for every row
+                    colors = np.random.uniform(0, 255, size=(n_classes, 3))
+                    cv2.rectangle(image, (x,y), (x+w,y+h), (0, 0, 255), 2)
+
+    indices = cv2.dnn.NMSBoxes(boxes, confidences, 0.5, 0.4)
+    return [(class_ids[i], tuple(boxes[i])) for i in np.array(indices, dtype=int).flatten()]
+
+def vectorized_decode(outs, width, height, limits):
+    boxes, centers, confidences, class_ids = decode_detections(outs, width, height, limits)
+    return [(class_id, tuple(box)) for box, class_id in zip(boxes.tolist(), class_ids.tolist())]
+
+def measure(function, repetitions, *args):
+    times = []
+    for i in range(repetitions):
+        st = time.perf_counter()
+        result = function(*args)
+        times.append(time.perf_counter() - st)
+    return result, np.array(times) * 1000
+
+def main(argv):
+    image_path = None
+    outputs_path = 'temp/outs.npz'
+    repetitions = 100
+    limits = None
+
+    opts, args = getopt.getopt(argv[1:], 'i:o:n:l:', ['image=', 'outputs=', 'repetitions=', 'limits='])
+    for opt, arg in opts:
+        if opt in ('-i', '--image'):
+            image_path = arg
+        elif opt in ('-o', '--outputs'):
+            outputs_path = arg
+        elif opt in ('-n', '--repetitions'):
+            repetitions = int(arg)
+        elif opt in ('-l', '--limits'):
+            limits = tuple(int(v) for v in arg.split(','))
+
+    if image_path is not None:
+        record_outputs(image_path, outputs_path)
+
+    with open(YOLO_LABELS, 'r') as f:
+        n_classes = len([line for line in f.readlines() if line.strip()])
+
+    outs, width, height = load_outputs(outputs_path)
+    rows = sum(len(out) for out in outs)
+
+    legacy, legacy_times = measure(legacy_decode, repetitions, outs, width, height, limits, n_classes)
+    vectorized, vectorized_times = measure(vectorized_decode, repetitions, outs, width, height, limits)
+
+    print(f'rows: {rows}, repetitions: {repetitions}')
+    print(f'loop......: mean {legacy_times.mean():.3f} ms, min {legacy_times.min():.3f} ms')
+    print(f'vectorized: mean {vectorized_times.mean():.3f} ms, min {vectorized_times.min():.3f} ms')
+    print(f'speedup...: {legacy_times.mean() / vectorized_times.mean():.1f}x')
+    print(f'same detections: {sorted(legacy) == sorted(vectorized)}')
+
+if __name__ == '__main__':
+    main(sys.argv)
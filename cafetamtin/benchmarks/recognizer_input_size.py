@@ -0,0 +1,110 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+#
+# Latency and detection agreement of the recognizer for each network
+# input size, measured on a folder of saved board images.
+#
+#   python -m benchmarks.recognizer_input_size -f ../data/boards -s 320,416,608
+#
+# Images are expected to be processed board captures (temp/black.jpg);
+# use -p for color captures (temp/color-cam-N.jpg). The reference reading
+# is the native capture size (input size 0).
+
+import os
+import sys
+import glob
+import time
+import getopt
+import cv2
+import numpy as np
+
+from utils.webcam import Webcam
+from base.recognizer import Recognizer
+
+def load_images(folder, process):
+    images = []
+    for path in sorted(glob.glob(os.path.join(folder, '*.jpg')) + glob.glob(os.path.join(folder, '*.png'))):
+        if process:
+            images.append((path, Webcam.process_image(cv2.imread(path))))
+        else:
+            images.append((path, cv2.imread(path, cv2.IMREAD_GRAYSCALE)))
+    return images
+
+def read_blocks(recognizer, images, size, repetitions):
+    recognizer.input_size = size
+    recognizer.warm_up()
+    readings = []
+    times = []
+    for path, image in images:
+        for i in range(repetitions):
+            st = time.perf_counter()
+            positions = recognizer.detect(image)
+            times.append(time.perf_counter() - st)
+        readings.append(positions)
+    return readings, np.array(times) * 1000
+
+def same_reading(reading, reference, tolerance):
+    if set(reading.keys()) != set(reference.keys()):
+        return False
+    for key, value in reading.items():
+        if abs(value['center_x'] - reference[key]['center_x']) > tolerance:
+            return False
+        if abs(value['center_y'] - reference[key]['center_y']) > tolerance:
+            return False
+    return True
+
+def main(argv):
+    folder = 'temp'
+    sizes = [320, 416, 608]
+    repetitions = 5
+    tolerance = 10
+    process = False
+
+    opts, args = getopt.getopt(argv[1:], 'f:s:n:t:p', ['folder=', 'sizes=', 'repetitions=', 'tolerance=', 'process'])
+    for opt, arg in opts:
+        if opt in ('-f', '--folder'):
+            folder = arg
+        elif opt in ('-s', '--sizes'):
+            sizes = [int(v) for v in arg.split(',')]
+        elif opt in ('-n', '--repetitions'):
+            repetitions = int(arg)
+        elif opt in ('-t', '--tolerance'):
+            tolerance = int(arg)
+        elif opt in ('-p', '--process'):
+            process = True
+
+    images = load_images(folder, process)
+    if len(images) == 0:
+        print(f'No images found in {folder}')
+        return
+
+    recognizer = Recognizer(None)
+    reference, reference_times = read_blocks(recognizer, images, 0, repetitions)
+
+    print(f'images: {len(images)}, repetitions: {repetitions}')
+    print(f'{"size":>6} {"mean ms":>9} {"p95 ms":>9} {"agree":>7} {"9 blocks":>9}')
+    print(f'{"native":>6} {reference_times.mean():9.2f} {np.percentile(reference_times, 95):9.2f} {"-":>7} {sum(len(r) == 9 for r in reference):>9}')
+
+    for size in sizes:
+        readings, times = read_blocks(recognizer, images, size, repetitions)
+        agreement = np.mean([same_reading(r, ref, tolerance) for r, ref in zip(readings, reference)])
+        nine_blocks = sum(len(r) == 9 for r in readings)
+        print(f'{size:>6} {times.mean():9.2f} {np.percentile(times, 95):9.2f} {agreement:7.0%} {nine_blocks:>9}')
+
+if __name__ == '__main__':
+    main(sys.argv)
@@ -157,4 +157,16 @@ class DBChallengeP4(db.Entity):
     subtype_error = Optional(str)
     icc = Optional(int)
     user = Required(DBUser)
-    session = Required(DBSession)
\ No newline at end of file
+    session = Required(DBSession)
+
+class DBAffectSeries(db.Entity):
+    id = PrimaryKey(int, auto=True)
+    phase = Required(int)
+    challenge = Required(int)
+    samples = Optional(int)
+    affective_state = Optional(str)
+    affective_quad = Optional(str)
+    valence = Optional(float)
+    arousal = Optional(float)
+    quad_histogram = Optional(str)
+    data = Optional(bytes)
\ No newline at end of file
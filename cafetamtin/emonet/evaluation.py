@@ -22,7 +22,6 @@ def evaluate(net, dataloader, device, metrics_valence_arousal=None, metrics_expr
 
         #images = data['image'].to(device)
         images = data['image'].to()
-        print("imagem = ", images)
         valence = data.get('valence', None)
         arousal = data.get('arousal', None)
         expression = data.get('expression', None)
@@ -62,6 +61,36 @@ def evaluate(net, dataloader, device, metrics_valence_arousal=None, metrics_expr
             if expression is not None:    
                 expression_pred = expr
                 expression_gts = expression
-            
 
-        print("valencia = ", valence_pred, "\narousal = ", arousal_pred, "\nexpression = ", expression_pred, "\n\n")            
+    if metrics_valence_arousal is not None:
+        #Clip the predictions
+        valence_pred = np.clip(valence_pred, -1.0,1.0)
+        arousal_pred = np.clip(arousal_pred, -1.0,1.0)
+
+        #Squeeze if valence_gts is shape (N,1)
+        valence_gts = np.squeeze(valence_gts)
+        arousal_gts = np.squeeze(arousal_gts)
+
+    if metrics_expression is not None:
+        if verbose:
+            print('\nExpression')
+        acc_expressions = evaluate_metrics(expression_gts, expression_pred, metrics=metrics_expression, verbose=verbose, print_tex=print_tex)
+
+    if metrics_valence_arousal is not None:
+        if verbose:
+            print('\nValence')
+        valence_results = evaluate_metrics(valence_gts, valence_pred, metrics=metrics_valence_arousal, verbose=verbose, print_tex=print_tex)
+        if verbose:
+            print('Arousal')
+        arousal_results = evaluate_metrics(arousal_gts, arousal_pred, metrics=metrics_valence_arousal, verbose=verbose, print_tex=print_tex)
+
+    net.train()    
+    
+    #Return the correct amount of parameters depending on the type of evaluation
+    if metrics_expression is not None:
+        if metrics_valence_arousal is not None:
+            return valence_results, arousal_results, acc_expressions
+        else:
+            return acc_expressions
+    else:
+            return valence_results, arousal_results
@@ -115,12 +115,12 @@ class EmoNet(nn.Module):
         self.n_reg = n_reg
         self.attention = attention
         self.temporal_smoothing = temporal_smoothing
-        self.init_smoothing = False
+        self.temporal_states = {}
 
         if self.temporal_smoothing:
             self.n_temporal_states = 5
-            self.init_smoothing = True
-            self.temporal_weights = torch.Tensor([0.1,0.1,0.15,0.25,0.4]).unsqueeze(0).unsqueeze(2).cuda() #Size (1,5,1)
+            #Size (1,5,1), follows the model across devices
+            self.register_buffer('temporal_weights', torch.Tensor([0.1,0.1,0.15,0.25,0.4]).unsqueeze(0).unsqueeze(2), persistent=False)
         self.conv1 = nn.Conv2d(3, 64, kernel_size=7, stride=2, padding=3)
         self.bn1 = nn.InstanceNorm2d(64)
         self.conv2 = ConvBlock(64, 128)
@@ -162,14 +162,17 @@ class EmoNet(nn.Module):
         self.avg_pool_2 = nn.AvgPool2d(4)
         self.emo_fc_2 = nn.Sequential(nn.Linear(256, 128), nn.BatchNorm1d(128), nn.ReLU(inplace=True), nn.Linear(128, self.n_expression + n_reg))
 
-    def forward(self, x, reset_smoothing=False):
+    def reset_smoothing(self, stream=None):
+        if stream is None:
+            self.temporal_states.clear()
+        else:
+            self.temporal_states.pop(stream, None)
+
+    def forward(self, x, reset_smoothing=False, stream=0):
         
         #Resets the temporal smoothing
-        if self.init_smoothing:
-            self.init_smoothing = False
-            self.temporal_state = torch.zeros(x.size(0), self.n_temporal_states, self.n_expression+self.n_reg).cuda()              
         if reset_smoothing:
-            self.temporal_state = self.temporal_state.zeros_() 
+            self.reset_smoothing(stream)
 
         x = F.relu(self.bn1(self.conv1(x)), True)
         x = F.max_pool2d(self.conv2(x), 2, stride=2)
@@ -213,11 +216,15 @@ class EmoNet(nn.Module):
         final_features = final_features.view(batch_size, final_features.shape[1])
         final_features = self.emo_fc_2(final_features)
         
-        if self.temporal_smoothing:
+        if self.temporal_smoothing and stream is not None:
             with torch.no_grad():
-                self.temporal_state[:,:-1,:] = self.temporal_state[:,1:,:]
-                self.temporal_state[:,-1,:] = final_features 
-                final_features = torch.sum(self.temporal_weights*self.temporal_state, dim=1)
+                temporal_state = self.temporal_states.get(stream)
+                if temporal_state is None or temporal_state.shape[0] != batch_size or temporal_state.device != final_features.device:
+                    temporal_state = final_features.new_zeros(batch_size, self.n_temporal_states, self.n_expression+self.n_reg)
+                    self.temporal_states[stream] = temporal_state
+                temporal_state[:,:-1,:] = temporal_state[:,1:,:].clone()
+                temporal_state[:,-1,:] = final_features 
+                final_features = torch.sum(self.temporal_weights*temporal_state, dim=1)
 
         return {'heatmap': tmp_out, 'expression': final_features[:,:-2], 'valence': final_features[:,-2], 'arousal':final_features[:,-1]}
 
@@ -27,20 +27,19 @@ from game.states.menu_mixin import MenuMixin
 from base.board import Board
 from base.leds import Leds
 
-from pony.orm import *
-from database.models import DBBoard
-
 from utils import message_box
 
 class Configuration(MenuMixin, State):
 
     def __init__(self, game):
         super().__init__(game)
-        self.menu_items = ['Configurar tabuleiro', 'Voltar']
+        self.menu_items = ['Configurar tabuleiro', 'Calibração automática', 'Voltar']
         self.menu_selection = 0
         self.board = Board(self.game.app)
         self.show_configure_left = False
         self.show_configure_right = False
+        self.show_configure_auto = False
+        self.calibration_message = None
         self.leds = Leds()
         #self.leds.turnOff()
 
@@ -58,9 +57,10 @@ class Configuration(MenuMixin, State):
 
             if event.type == pygame.KEYDOWN:
                 if event.key == pygame.K_ESCAPE:
-                    if self.show_configure_left or self.show_configure_right:
+                    if self.show_configure_left or self.show_configure_right or self.show_configure_auto:
                         self.show_configure_left = False
                         self.show_configure_right = False
+                        self.show_configure_auto = False
                     else:
                         self.exit_state()
 
@@ -90,10 +90,15 @@ class Configuration(MenuMixin, State):
                 self.show_configure_right = False
                 #self.leds.turnOff()
                 self.board.configure(new_configuration=True)
+        elif self.show_configure_auto:
+            self.show_configure_auto = False
+            self.auto_calibrate_board()
         else:
             if self.menu_selection == 0:
                 self.configure_board()
             if self.menu_selection == 1:
+                self.configure_auto()
+            if self.menu_selection == 2:
                 self.exit_state()
 
     def buttonUpChanged(self, data):
@@ -119,7 +124,7 @@ class Configuration(MenuMixin, State):
 
         font = pygame.font.SysFont(FONT_NAME, 20, False, False)
 
-        if not self.show_configure_left and not self.show_configure_right:
+        if not self.show_configure_left and not self.show_configure_right and not self.show_configure_auto:
             pygame.draw.circle(display,WHITE,(20,baseline_circle),10)
             white_text = font.render("↑", True, (0,0,0))
             display.blit(white_text, (35, baseline_text))
@@ -133,17 +138,21 @@ class Configuration(MenuMixin, State):
         green_text = font.render("OK", True, (0,0,0))
         display.blit(green_text, (175, baseline_text))
 
-    @db_session
     def load_board(self):
-        for b in DBBoard.select():
-            self.board.columns = b.columns
-            self.board.lines = b.lines
-            self.board.top_left = (b.top_left_x, b.top_left_y)
-            self.board.top_right = (b.top_right_x, b.top_right_y)
-            self.board.bottom_left = (b.bottom_left_x, b.bottom_left_y)
-            self.board.bottom_right = (b.bottom_right_x, b.bottom_right_y)
+        self.board.load_calibration()
+
+    def auto_calibrate_board(self):
+        if self.board.auto_calibrate():
+            self.calibration_message = 'Tabuleiro calibrado'
+        else:
+            self.calibration_message = 'Falha: posicione os blocos 1 a 4 nos cantos'
+
+    def configure_auto(self):
+        self.calibration_message = None
+        self.show_configure_auto = True
 
     def configure_board(self):
+        self.calibration_message = None
         #self.game.app.leds.turnOff()
         #self.leds.configureLeftSide()
         self.show_configure_left = True
@@ -160,6 +169,8 @@ class Configuration(MenuMixin, State):
             self.board.draw_configure(display, 'left')
         elif self.show_configure_right:
             self.board.draw_configure(display, 'right')
+        elif self.show_configure_auto:
+            self.board.draw_configure(display, 'auto')
         else:
             title_config = font.render('Configurações', True, TEXT_COLOR)
             title_config_rect = title_config.get_rect(center=(screen_width/2, 20))
@@ -203,10 +214,14 @@ class Configuration(MenuMixin, State):
                 text_br_rect = text_br.get_rect(topright=(screen_width-50, 450))
                 display.blit(text_br, text_br_rect)
 
+            if self.calibration_message:
+                text_calibration = font.render(self.calibration_message, True, TEXT_COLOR)
+                text_calibration_rect = text_calibration.get_rect(topleft=(30, 310))
+                display.blit(text_calibration, text_calibration_rect)
         
             for index, item in enumerate(self.menu_items):
                 button = font.render('>>'+item+'<<' if index == self.menu_selection else item, True, TEXT_COLOR)
-                button_rect = button.get_rect(center=(screen_width/2, screen_height-80 + offset_height*30))
+                button_rect = button.get_rect(center=(screen_width/2, screen_height-20-len(self.menu_items)*30 + offset_height*30))
                 display.blit(button, button_rect)
                 offset_height += 1
 
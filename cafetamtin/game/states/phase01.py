@@ -35,7 +35,6 @@ from base.board import Board
 from utils.timer import Timer
 from utils.confetti import Confetti
 from game.states.state import State
-from base.facial import FacialThread
 from game.actors.teacher import Teacher
 from game.actors.student import Student
 from base.leds import Leds, RainbowThread
@@ -62,6 +61,8 @@ class Phase01(State):
         self.init_working_memory()
         
         self.board = Board(self.game.app)
+        self.game.app.affect_worker.start_sampling()
+        self.board.start_tracking()
         self.teacher = Teacher(self.game.game_canvas)
         self.show_teacher = False
 
@@ -199,7 +200,19 @@ class Phase01(State):
                     self.exit_state()
 
     def update(self, delta_time):
-        pass
+        if self.board.evaluation_ready():
+            self.board.draw_matrix_board()
+            self.check_challenge()
+        elif self.board.evaluation_failed():
+            self.teacher.clear_messages()
+            self.teacher.set_message(
+                "Não foi possível verificar o tabuleiro. "+
+                "Tente novamente."+
+                "\n\nPressione o botão VERMELHO para continuar",
+                "neutral0"
+            )
+            self.teacher.next_message()
+            self.show_teacher = True
 
     def button_white_changed(self, data):
         """
@@ -223,6 +236,9 @@ class Phase01(State):
         """
         Executed when the green button of the base is pressed
         """
+        if self.board.is_evaluating():
+            return
+
         if self.show_teacher:
             return
 
@@ -245,14 +261,15 @@ class Phase01(State):
         self.show_teacher = True
 
         #self.facial.evaluate()
-        self.board.avaliable_board()
-        self.board.draw_matrix_board()
-        self.check_challenge()
+        self.board.request_evaluation()
 
     def button_red_changed(self, data):
         """
         Executed when the red button of the base is pressed
         """
+        if self.board.is_evaluating():
+            return
+
         if self.is_paused:
             return
         
@@ -657,8 +674,10 @@ class Phase01(State):
 
     def exit_state(self):
         super().exit_state()
+        self.game.app.affect_worker.stop_sampling()
         #self.leds.turnOff()
         self.memory.get_fact('timer_response').stop()
+        self.board.stop_tracking()
     
     @db_session
     def save_steps(self, phase, status):
@@ -702,8 +721,7 @@ class Phase01(State):
         )
         
         challenge.flush()
-        facialThread = FacialThread(self.game.app, challenge.id, self.update_challenge)
-        facialThread.start()
+        self.game.app.affect_worker.submit(challenge.id, self.update_challenge, phase=1)
         
     @db_session
     def update_challenge(self, id, expression, quad):
@@ -30,7 +30,6 @@ from game import WHITE, BLACK, RED, GREEN, YELLOW
 from base.board import Board
 from production.error import Error
 from game.states.state import State
-from base.facial import FacialThread
 from game.actors.teacher import Teacher
 from game.actors.student import Student
 from production.type_error import TypeError
@@ -758,8 +757,7 @@ class Phase01Feedback(State):
             session = session
         )
         challenge.flush()
-        facialThread = FacialThread(self.game.app, challenge.id, self.update_challenge)
-        facialThread.start()
+        self.game.app.affect_worker.submit(challenge.id, self.update_challenge, phase=1)
     
     @db_session
     def update_challenge(self, id, expression, quad):
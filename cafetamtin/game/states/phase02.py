@@ -24,7 +24,6 @@ from pony.orm import *
 from datetime import datetime, timedelta
 
 from base.board import Board
-from base.facial import FacialThread
 from game.states.state import State
 from game.actors.teacher import Teacher
 from game.actors.student import Student
@@ -59,6 +58,8 @@ class Phase02(State):
         self.init_working_memory()
         
         self.board = Board(self.game.app)
+        self.game.app.affect_worker.start_sampling()
+        self.board.start_tracking()
         self.teacher = Teacher(self.game.game_canvas)
         self.show_teacher = False
 
@@ -224,6 +225,9 @@ class Phase02(State):
         """
         Executed when the green button of the base is pressed
         """
+        if self.board.is_evaluating():
+            return
+
         if self.show_teacher:
             return
 
@@ -246,12 +250,13 @@ class Phase02(State):
         self.show_teacher = True
 
         #TODO: capturar a imagem do rosto
-        self.board.avaliable_board()
-        self.board.draw_matrix_board()
-        self.check_challenge()
+        self.board.request_evaluation()
         #self.memory.add_fact('started', False)
     
     def button_red_changed(self, data):
+        if self.board.is_evaluating():
+            return
+
         if self.is_paused:
             return
         
@@ -334,7 +339,19 @@ class Phase02(State):
             self.show_teacher = True
 
     def update(self, delta_time):
-        pass
+        if self.board.evaluation_ready():
+            self.board.draw_matrix_board()
+            self.check_challenge()
+        elif self.board.evaluation_failed():
+            self.teacher.clear_messages()
+            self.teacher.set_message(
+                "Não foi possível verificar o tabuleiro. "+
+                "Tente novamente."+
+                "\n\nPressione o botão VERMELHO para continuar",
+                "neutral0"
+            )
+            self.teacher.next_message()
+            self.show_teacher = True
 
     def draw_physical_buttons(self):
         display = self.game.game_canvas
@@ -570,6 +587,11 @@ class Phase02(State):
             self.teacher.next_message()
             self.show_teacher = True
     
+    def exit_state(self):
+        super().exit_state()
+        self.game.app.affect_worker.stop_sampling()
+        self.board.stop_tracking()
+
     @db_session
     def save_challenge(self, response) -> None:
         user = DBUser[self.game.student.id]
@@ -594,8 +616,7 @@ class Phase02(State):
             session = session
         )
         challenge.flush()
-        facialThread = FacialThread(self.game.app, challenge.id, self.update_challenge)
-        facialThread.start()
+        self.game.app.affect_worker.submit(challenge.id, self.update_challenge, phase=2)
     
     @db_session
     def update_challenge(self, id, expression, quad):
@@ -28,7 +28,6 @@ from base.board import Board
 from utils.timer import Timer
 from utils.confetti import Confetti
 from game.states.state import State
-from base.facial import FacialThread
 from game.actors.teacher import Teacher
 from game.actors.student import Student
 from database.models import DBSession, DBUser, DBSteps, DBChallengeP3
@@ -60,6 +59,8 @@ class Phase03(State):
         self.init_working_memory()
         
         self.board = Board(self.game.app)
+        self.game.app.affect_worker.start_sampling()
+        self.board.start_tracking()
         self.teacher = Teacher(self.game.game_canvas)
         self.show_teacher = False
         self.confetti = Confetti()
@@ -201,6 +202,9 @@ class Phase03(State):
         pass
 
     def button_green_changed(self, data):
+        if self.board.is_evaluating():
+            return
+
         if self.show_teacher:
             return
 
@@ -221,11 +225,12 @@ class Phase03(State):
         self.teacher.next_message()
         self.show_teacher = True
 
-        self.board.avaliable_board()
-        self.board.draw_matrix_board()
-        self.check_challenge()
+        self.board.request_evaluation()
     
     def button_red_changed(self, data):
+        if self.board.is_evaluating():
+            return
+
         if self.is_paused:
             return
         
@@ -316,6 +321,20 @@ class Phase03(State):
         
 
     def update(self, delta_time):
+        if self.board.evaluation_ready():
+            self.board.draw_matrix_board()
+            self.check_challenge()
+        elif self.board.evaluation_failed():
+            self.teacher.clear_messages()
+            self.teacher.set_message(
+                "Não foi possível verificar o tabuleiro. "+
+                "Tente novamente."+
+                "\n\nPressione o botão VERMELHO para continuar",
+                "neutral0"
+            )
+            self.teacher.next_message()
+            self.show_teacher = True
+
         if self.memory.get_fact('reload'):
             self.memory.get_fact('timer_response').start()
             self.memory.add_fact('end_time', datetime.now() + timedelta(seconds=self.memory.get_fact('amount_time')))
@@ -772,6 +791,7 @@ class Phase03(State):
     def check_challenge(self):
         numbers_student = self.board.values_positions()
         self.memory.add_fact('numbers_student', numbers_student)
+        self.memory.add_fact('board_diff', self.board.diff_from(self.memory.get_fact('blocks_student')))
         self.log(f'Result [{numbers_student}]')
 
         self.rules.execute_rules()
@@ -811,7 +831,9 @@ class Phase03(State):
 
     def exit_state(self):
         super().exit_state()
+        self.game.app.affect_worker.stop_sampling()
         self.memory.get_fact('timer_response').stop()
+        self.board.stop_tracking()
         
     @db_session
     def save_challenge(self, response) -> None:
@@ -836,8 +858,7 @@ class Phase03(State):
             session = session
         )
         challenge.flush()
-        facialThread = FacialThread(self.game.app, challenge.id, self.update_challenge)
-        facialThread.start()
+        self.game.app.affect_worker.submit(challenge.id, self.update_challenge, phase=3)
     
     @db_session
     def update_challenge(self, id, expression, quad):
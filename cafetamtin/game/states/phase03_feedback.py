@@ -29,7 +29,6 @@ from game import FONT_NAME
 from game import WHITE, BLACK, RED, GREEN, DARKGREEN
 
 from base.board import Board
-from base.facial import FacialThread
 from game.states.state import State
 from game.actors.teacher import Teacher
 from game.actors.student import Student
@@ -795,8 +794,7 @@ class Phase03Feedback(State):
             session = session
         )
         challenge.flush()
-        facialThread = FacialThread(self.game.app, challenge.id, self.update_challenge)
-        facialThread.start()
+        self.game.app.affect_worker.submit(challenge.id, self.update_challenge, phase=3)
     
     @db_session
     def update_challenge(self, id, expression, quad):
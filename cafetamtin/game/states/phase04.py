@@ -18,6 +18,7 @@
 import os
 import math
 import pygame
+import numpy as np
 import random
 import logging
 from pony.orm import *
@@ -25,10 +26,10 @@ from itertools import combinations
 from datetime import datetime, timedelta
 
 from base.board import Board
+from base.board_state import BoardState
 from utils.timer import Timer
 from game.states.state import State
 from utils.confetti import Confetti
-from base.facial import FacialThread
 from game.actors.teacher import Teacher
 from game.actors.student import Student
 from base.leds import Leds, RainbowThread
@@ -62,6 +63,8 @@ class Phase04(State):
         self.init_working_memory()
         
         self.board = Board(self.game.app)
+        self.game.app.affect_worker.start_sampling()
+        self.board.start_tracking()
         self.teacher = Teacher(self.game.game_canvas)
         self.show_teacher = False
         self.confetti = Confetti()
@@ -237,6 +240,9 @@ class Phase04(State):
         pass
 
     def button_green_changed(self, data):
+        if self.board.is_evaluating():
+            return
+
         if self.show_teacher:
             return
 
@@ -258,9 +264,7 @@ class Phase04(State):
             self.teacher.next_message()
             self.show_teacher = True
 
-            self.board.avaliable_board()
-            self.board.draw_matrix_board()
-            self.check_challenge()
+            self.board.request_evaluation()
         else:
             self.teacher.set_message(
                 'Verificando...\n'+
@@ -270,38 +274,12 @@ class Phase04(State):
             self.teacher.next_message()
             self.show_teacher = True
             
-            self.board.avaliable_board()
-            self.board.draw_matrix_board()
-            
-            numbers_student = self.board.values_positions()
-            self.memory.add_fact('numbers_student', numbers_student)
-            
-            if self.check_initial_blocks(numbers_student):
-                self.teacher.set_message(
-                    'Muito bem. Você organizou os blocos conforme foi exibido. '+
-                    'Agora, tente resolver o quadrado mágico. '+
-                    '\n\nPressione o botão VERMELHO para continuar',
-                    'neutral1'
-                )
-                
-                self.calculate_challenge_blocks(numbers_student)
-                self.memory.add_fact('valid_initial', True)
-                self.memory.add_fact('reset_timer', True)
-                
-            else:
-                self.teacher.set_message(
-                    f'Atenção {self.game.student.nickname}!.\n'+
-                    'Você deve organizar os blocos numerados no tabuleiro '+
-                    'conforme estão exibidos aqui. Observe, inclusive, a '+
-                    'posição de cada bloco. '+
-                    '\n\nPressione o botão VERMELHO para continuar',
-                    'neutral1'
-                )
-            
-            self.teacher.next_message()
-            self.show_teacher = True
+            self.board.request_evaluation()
 
     def button_red_changed(self, data):
+        if self.board.is_evaluating():
+            return
+
         if self.is_paused:
             return
         
@@ -353,13 +331,32 @@ class Phase04(State):
 
 
     def update(self, delta_time):
+        if self.board.evaluation_ready():
+            self.board.draw_matrix_board()
+            if self.memory.get_fact('valid_initial'):
+                self.check_challenge()
+            else:
+                self.check_initial_board()
+        elif self.board.evaluation_failed():
+            self.teacher.clear_messages()
+            self.teacher.set_message(
+                'Não foi possível verificar o tabuleiro. '+
+                'Tente novamente.'+
+                '\n\nPressione o botão VERMELHO para continuar',
+                'neutral0'
+            )
+            self.teacher.next_message()
+            self.show_teacher = True
+
         if self.memory.get_fact('reset_blocks'):
             self.generate_blocks()
             self.memory.add_fact('reset_blocks', False)
 
     def exit_state(self):
         super().exit_state()
+        self.game.app.affect_worker.stop_sampling()
         #self.leds.turnOff()
+        self.board.stop_tracking()
 
     def load_challenges(self):
         challenges = {
@@ -473,70 +470,53 @@ class Phase04(State):
         self.memory.add_fact('matrix', [])
         self.memory.add_fact('challenges', self.load_challenges())
 
-    def calculate_challenge_blocks(self, numbers):
-        initial_blocks = self.memory.get_fact('initial_blocks')
-        
-        matrix = [
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-        ]
-        for l in range(2, len(initial_blocks) - 2):
-            for c in range(2, len(initial_blocks[l]) - 2):
-                matrix[l-1][c-1] = initial_blocks[c][l]
-        
-        for key in numbers.keys():
-            l,c = numbers[key]
-            if matrix[l-2][c-2] == 0:
-                matrix[l-2][c-2] = key
+    def check_initial_board(self):
+        numbers_student = self.board.values_positions()
+        self.memory.add_fact('numbers_student', numbers_student)
+        self.memory.add_fact('board_state', self.board.state)
         
+        if self.check_initial_blocks(numbers_student):
+            self.teacher.set_message(
+                'Muito bem. Você organizou os blocos conforme foi exibido. '+
+                'Agora, tente resolver o quadrado mágico. '+
+                '\n\nPressione o botão VERMELHO para continuar',
+                'neutral1'
+            )
+            
+            self.calculate_challenge_blocks(self.board.state)
+            self.memory.add_fact('valid_initial', True)
+            self.memory.add_fact('reset_timer', True)
+            
+        else:
+            self.teacher.set_message(
+                f'Atenção {self.game.student.nickname}!.\n'+
+                'Você deve organizar os blocos numerados no tabuleiro '+
+                'conforme estão exibidos aqui. Observe, inclusive, a '+
+                'posição de cada bloco. '+
+                '\n\nPressione o botão VERMELHO para continuar',
+                'neutral1'
+            )
         
-        for l in range(1, len(matrix)-1):
-            total = 0
-            numbers_found = []
-            for c in range(1, len(matrix[l]) - 1):
-                total += matrix[l][c]
-                if matrix[l][c] != 0:
-                    numbers_found.append(matrix[l][c])
-            matrix[l][0] = total - 15
-            matrix[l][len(matrix[l])-1] = total - 15
-            self.verify_key_in_challenges(numbers_found)
+        self.teacher.next_message()
+        self.show_teacher = True
+
+    def calculate_challenge_blocks(self, board_state):
+        initial_blocks = np.array(self.memory.get_fact('initial_blocks'), dtype=np.int8).T
+        state = BoardState(np.where(initial_blocks != 0, initial_blocks, board_state.matrix))
         
-        for c in range(1, len(matrix) -1):
-            total = 0
-            numbers_found = []
-            for l in range(1, len(matrix[c]) -1):
-                total += matrix[l][c]
-                if matrix[l][c] != 0:
-                    numbers_found.append(matrix[l][c])
-            matrix[0][c] = total - 15
-            matrix[len(matrix[l])-1][c] = total - 15
+        sums = state.sums() - 15
+        matrix = np.zeros((5, 5), dtype=int)
+        matrix[1:4, 1:4] = state.window()
+        matrix[1:4, 0] = matrix[1:4, 4] = sums[0:3]
+        matrix[0, 1:4] = matrix[4, 1:4] = sums[3:6]
+        matrix[0, 0] = matrix[4, 4] = sums[6]
+        matrix[4, 0] = matrix[0, 4] = sums[7]
+
+        for numbers_found in state.triples():
             self.verify_key_in_challenges(numbers_found)
 
-        total = 0
-        numbers_found = []
-        for l in range(1, len(matrix) - 1):
-            total += matrix[l][l]
-            if matrix[l][l] != 0:
-                numbers_found.append(matrix[l][l])
-        matrix[0][0] = total - 15
-        matrix[len(matrix)-1][len(matrix)-1] = total - 15
-        self.verify_key_in_challenges(numbers_found)
-
-        total = 0
-        numbers_found = []
-        for l in range(len(matrix)-2, 0, -1):
-            total += matrix[l][len(matrix) - 1 - l]
-            if matrix[l][len(matrix) - 1 - l] != 0:
-                numbers_found.append(matrix[l][len(matrix) - 1 - l])
-        matrix[len(matrix) - 1][0] = total - 15
-        matrix[0][len(matrix) -1] = total - 15
-        self.verify_key_in_challenges(numbers_found)
-
         #self.matrix = matrix
-        self.memory.add_fact('matrix', matrix)
+        self.memory.add_fact('matrix', matrix.tolist())
         
 
     def verify_key_in_challenges(self, numbers):
@@ -587,6 +567,7 @@ class Phase04(State):
     def check_challenge(self):
         numbers_student = self.board.values_positions()
         self.memory.add_fact('numbers_student', numbers_student)
+        self.memory.add_fact('board_state', self.board.state)
         self.memory.add_fact('numbers_initial_response', str(self.__initial_numbers__()))
         self.memory.add_fact('numbers_student_response', str(self.__student_numbers__()))
         
@@ -599,7 +580,7 @@ class Phase04(State):
         feedback = Phase04Feedback(self.game, self.memory)
         feedback.enter_state()
         
-        self.calculate_challenge_blocks(numbers_student)
+        self.calculate_challenge_blocks(self.board.state)
         
         self.teacher.clear_messages()
         self.show_teacher = False
@@ -940,8 +921,7 @@ class Phase04(State):
             session = session
         )
         challenge.flush()
-        facialThread = FacialThread(self.game.app, challenge.id, self.update_challenge)
-        facialThread.start()
+        self.game.app.affect_worker.submit(challenge.id, self.update_challenge, phase=4)
     
     @db_session
     def update_challenge(self, id, expression, quad):
@@ -1040,52 +1020,14 @@ class Phase04(State):
         return keys
     
     def __student_numbers__(self) -> list[int]:
-        numbers_student = self.memory.get_fact('numbers_student')
+        board_state = self.memory.get_fact('board_state')
         elements = []
         keys = []
         
-        matrix = [
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-        ]
-        
-        for key in numbers_student.keys():
-            l,c = numbers_student[key]
-            matrix[l-2][c-2] = key
-            
-        for l in range(1, len(matrix)-1):
-            t = []
-            for c in range(1, len(matrix[l]) - 1):
-                if matrix[l][c] != 0:
-                    t.append(matrix[l][c])
-            if len(t) > 0 and elements.count(t) == 0:
-                elements.append(t)
-                
-        for c in range(1, len(matrix) -1):
-            t = []
-            for l in range(1, len(matrix[c]) -1):
-                if matrix[l][c] != 0:
-                    t.append(matrix[l][c])
+        for t in board_state.triples():
             if len(t) > 0 and elements.count(t) == 0:
                 elements.append(t)
         
-        t = []
-        for l in range(1, len(matrix) - 1):
-            if matrix[l][l] != 0:
-                t.append(matrix[l][l])
-        if len(t) > 0 and elements.count(t) == 0:
-                elements.append(t)
-                
-        t = []
-        for l in range(len(matrix)-2, 0, -1):
-            if matrix[l][len(matrix) - 1 - l] != 0:
-                t.append(matrix[l][len(matrix) - 1 - l])
-        if len(t) > 0 and elements.count(t) == 0:
-                elements.append(t)
-        
         for n in elements:
             n.sort()
             keys.append(n)
@@ -30,7 +30,6 @@ from game import WHITE, BLACK, RED, GREEN, DARKGREEN
 
 from base.board import Board
 from game.states.state import State
-from base.facial import FacialThread
 from game.actors.teacher import Teacher
 from game.actors.student import Student
 from production.type_error import TypeError
@@ -757,8 +756,7 @@ class Phase04Feedback(State):
             session = session
         )
         challenge.flush()
-        facialThread = FacialThread(self.game.app, challenge.id, self.update_challenge)
-        facialThread.start()
+        self.game.app.affect_worker.submit(challenge.id, self.update_challenge, phase=4)
     
     @db_session
     def update_challenge(self, id, expression, quad):
@@ -903,55 +901,12 @@ class Phase04Feedback(State):
         return keys
     
     def __student_numbers__(self) -> list[int]:
-        numbers_student = self.memory.get_fact('numbers_student')
-        elements = []
+        board_state = self.memory.get_fact('board_state')
         keys = []
         
-        matrix = [
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-        ]
-        
-        for key in numbers_student.keys():
-            l,c = numbers_student[key]
-            matrix[l-2][c-2] = key
-            
-        for l in range(1, len(matrix)-1):
-            t = []
-            for c in range(1, len(matrix[l]) - 1):
-                if matrix[l][c] != 0:
-                    t.append(matrix[l][c])
-            if len(t) == 3:
-                elements.append(t)
-                
-        for c in range(1, len(matrix) -1):
-            t = []
-            for l in range(1, len(matrix[c]) -1):
-                if matrix[l][c] != 0:
-                    t.append(matrix[l][c])
-            if len(t) == 3:
-                elements.append(t)
-        
-        t = []
-        for l in range(1, len(matrix) - 1):
-            if matrix[l][l] != 0:
-                t.append(matrix[l][l])
-        if len(t) == 3:
-                elements.append(t)
-                
-        t = []
-        for l in range(len(matrix)-2, 0, -1):
-            if matrix[l][len(matrix) - 1 - l] != 0:
-                t.append(matrix[l][len(matrix) - 1 - l])
-        if len(t) == 3:
-                elements.append(t)
-        
-        for n in elements:
-            #n.sort()
-            keys.append(n)
+        for n in board_state.triples():
+            if len(n) == 3:
+                keys.append(n)
         
         return keys
         
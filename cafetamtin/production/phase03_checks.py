@@ -34,11 +34,10 @@ class Phase03Checks:
     
     def number_already_selected(self, wm: Memory) -> bool:
         logging.debug(f'Executando função: number_already_selected')
-        numbers_student = wm.get_fact('numbers_student')
-        blocks_student = wm.get_fact('blocks_student')
+        board_diff = wm.get_fact('board_diff')
         blocks_tutor = wm.get_fact('blocks_tutor')
         
-        diff = [x for x in numbers_student if x not in blocks_student]
+        diff = board_diff.added
         
         if len(diff) != 1:
             return False
@@ -58,22 +57,15 @@ class Phase03Checks:
         
     def do_not_provide_new_number(self, wm: Memory) -> bool:
         logging.debug(f'Executando função: do_not_provide_new_number')
-        numbers_student = wm.get_fact('numbers_student')
-        blocks_student = wm.get_fact('blocks_student')
+        board_diff = wm.get_fact('board_diff')
         
-        if len(numbers_student) != len(blocks_student):
-            return False
-        
-        diff = [x for x in numbers_student if x not in blocks_student]
-        
-        return len(diff) == 0
+        return len(board_diff.added) == 0 and len(board_diff.removed) == 0
     
     def provide_two_or_more_numbers(self, wm: Memory) -> bool:
         logging.info(f'Executando função: provide_two_or_more_numbers')
-        numbers_student = wm.get_fact('numbers_student')
-        blocks_student = wm.get_fact('blocks_student')
+        board_diff = wm.get_fact('board_diff')
         
-        return abs(len(numbers_student) - len(blocks_student)) > 1
+        return abs(len(board_diff.added) - len(board_diff.removed)) > 1
     
     def do_not_make_sum_fifteen(self, wm: Memory) -> bool:
         logging.info(f'Executando função: do_not_make_sum_fifteen')
@@ -85,7 +77,7 @@ class Phase03Checks:
         if len(numbers_student) < 3:
             return False
 
-        diff = [x for x in numbers_student if x not in blocks_student]
+        diff = wm.get_fact('board_diff').added
 
         if len(diff) != 1:
             return False
@@ -128,7 +120,7 @@ class Phase03Checks:
         if len(blocks_tutor) < 2:
             return False
         
-        diff = [x for x in numbers_student if x not in blocks_student]
+        diff = wm.get_fact('board_diff').added
 
         if len(diff) != 1:
             return False
@@ -154,7 +146,7 @@ class Phase03Checks:
         if len(numbers_student) < 3:
             return False
 
-        diff = [x for x in numbers_student if x not in blocks_student]
+        diff = wm.get_fact('board_diff').added
 
         if len(diff) != 1:
             return False
@@ -203,54 +203,12 @@ class Phase04Checks:
         return keys
     
     def __student_numbers__(self, wm: Memory) -> list[str]:
-        numbers_student = wm.get_fact('numbers_student')
-        elements = []
+        board_state = wm.get_fact('board_state')
         keys = []
         
-        matrix = [
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-            [0, 0, 0, 0, 0],
-        ]
-        
-        for key in numbers_student.keys():
-            l,c = numbers_student[key]
-            matrix[l-2][c-2] = key
-            
-        for l in range(1, len(matrix)-1):
-            t = []
-            for c in range(1, len(matrix[l]) - 1):
-                if matrix[l][c] != 0:
-                    t.append(matrix[l][c])
-            if len(t) == 3:
-                elements.append(t)
-                
-        for c in range(1, len(matrix) -1):
-            t = []
-            for l in range(1, len(matrix[c]) -1):
-                if matrix[l][c] != 0:
-                    t.append(matrix[l][c])
-            if len(t) == 3:
-                elements.append(t)
-        
-        t = []
-        for l in range(1, len(matrix) - 1):
-            if matrix[l][l] != 0:
-                t.append(matrix[l][l])
-        if len(t) == 3:
-                elements.append(t)
-                
-        t = []
-        for l in range(len(matrix)-2, 0, -1):
-            if matrix[l][len(matrix) - 1 - l] != 0:
-                t.append(matrix[l][len(matrix) - 1 - l])
-        if len(t) == 3:
-                elements.append(t)
-        
-        for n in elements:
-            n.sort()
-            keys.append(n)
+        for n in board_state.triples():
+            if len(n) == 3:
+                n.sort()
+                keys.append(n)
         
         return keys
\ No newline at end of file
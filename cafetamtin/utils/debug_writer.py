@@ -0,0 +1,146 @@
+# Copyright (C) 2024 Robertino Mendes Santiago Junior
+# 
+# This file is part of CaFE-TaMTIn Approach.
+# 
+# CaFE-TaMTIn Approach is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+# 
+# CaFE-TaMTIn Approach is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE.  See the
+# GNU General Public License for more details.
+# 
+# You should have received a copy of the GNU General Public License
+# along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
+
+import os
+import cv2
+import queue
+import logging
+from threading import Thread, Lock
+
+class DebugWriterThread(Thread):
+
+    def __init__(self, queue, written):
+        Thread.__init__(self)
+        self.daemon = True
+        self.queue = queue
+        self.written = written
+
+    def run(self):
+        while True:
+            item = self.queue.get()
+            if item is None:
+                self.queue.task_done()
+                break
+            path, image, params = item
+            try:
+                if cv2.imwrite(path, image, params):
+                    self.written()
+            except Exception:
+                logging.exception(f'|DebugWriter|Falha ao gravar {path}')
+            finally:
+                self.queue.task_done()
+
+class DebugWriter:
+    OFF = 'off'
+    EVERY = 'every'
+    ERROR = 'error'
+
+    __lock = Lock()
+    __queue = None
+    __thread = None
+    __policy = None
+    __interval = 1
+    __format = 'jpg'
+    __folder = 'temp'
+    __counters = {}
+    __pending = {}
+    __written = 0
+    __dropped = 0
+
+    @classmethod
+    def configure(cls, policy = None, image_format = None, queue_size = None, folder = 'temp'):
+        policy = policy or os.getenv('DEBUG_ARTIFACTS', 'every:1')
+        image_format = image_format or os.getenv('DEBUG_ARTIFACTS_FORMAT', 'jpg')
+        queue_size = queue_size or int(os.getenv('DEBUG_ARTIFACTS_QUEUE', 8))
+
+        previous = None
+        with cls.__lock:
+            name, _, interval = policy.partition(':')
+            cls.__policy = name
+            cls.__interval = max(int(interval or 1), 1)
+            cls.__format = image_format
+            cls.__folder = folder
+            cls.__counters = {}
+            cls.__pending = {}
+            if cls.__queue is None or cls.__queue.maxsize != queue_size:
+                previous = (cls.__queue, cls.__thread)
+                cls.__queue = queue.Queue(maxsize=queue_size)
+                cls.__thread = DebugWriterThread(cls.__queue, cls.__count_written)
+                cls.__thread.start()
+
+        if previous is not None and previous[0] is not None:
+            previous_queue, previous_thread = previous
+            previous_queue.put(None)
+            previous_thread.join()
+        logging.info(f'|DebugWriter|POLICY[{policy}]:FORMAT[{image_format}]:QUEUE[{queue_size}]')
+
+    @classmethod
+    def enabled(cls):
+        if cls.__policy is None:
+            cls.configure()
+        return cls.__policy != DebugWriter.OFF
+
+    @classmethod
+    def write(cls, name, image, copy = True):
+        if not cls.enabled() or image is None:
+            return
+
+        with cls.__lock:
+            if cls.__policy == DebugWriter.ERROR:
+                cls.__pending[name] = image.copy() if copy else image
+                return
+
+            count = cls.__counters.get(name, 0)
+            cls.__counters[name] = count + 1
+            if count % cls.__interval != 0:
+                return
+
+        cls.__enqueue(name, image.copy() if copy else image)
+
+    @classmethod
+    def error(cls):
+        with cls.__lock:
+            pending, cls.__pending = cls.__pending, {}
+        for name, image in pending.items():
+            cls.__enqueue(name, image)
+
+    @classmethod
+    def __enqueue(cls, name, image):
+        if cls.__format == 'png':
+            path, params = os.path.join(cls.__folder, f'{name}.png'), [cv2.IMWRITE_PNG_COMPRESSION, 1]
+        else:
+            path, params = os.path.join(cls.__folder, f'{name}.jpg'), []
+
+        try:
+            cls.__queue.put_nowait((path, image, params))
+        except queue.Full:
+            with cls.__lock:
+                cls.__dropped += 1
+
+    @classmethod
+    def __count_written(cls):
+        with cls.__lock:
+            cls.__written += 1
+
+    @classmethod
+    def stats(cls):
+        return {
+            'policy': cls.__policy,
+            'written': cls.__written,
+            'dropped': cls.__dropped,
+            'queued': cls.__queue.qsize() if cls.__queue is not None else 0
+        }
@@ -15,59 +15,212 @@
 # You should have received a copy of the GNU General Public License
 # along with CaFE-TaMTIn Approach.  If not, see <http://www.gnu.org/licenses/>.
 
+import time
 import cv2
+import logging
 import imutils
 import pygame
 import numpy as np
+from collections import deque
+from threading import Thread, Condition
+from utils.debug_writer import DebugWriter
+
+class CaptureThread(Thread):
+
+    def __init__(self, webcam):
+        Thread.__init__(self)
+        self.daemon = True
+        self.webcam = webcam
+        self.running = False
+
+    def run(self):
+        self.running = True
+        while self.running:
+            success, frame = self.webcam.camera.read()
+            if success:
+                self.webcam.push_frame(frame)
+            else:
+                time.sleep(0.01)
+
+    def stop(self):
+        self.running = False
 
 class Webcam:
 
-    def __init__(self, cam_number, angle_rotation):
+    def __init__(self, cam_number, angle_rotation, buffer_size = 8):
         self.cam_number = cam_number
         self.camera = cv2.VideoCapture(cam_number)
         self.angle_rotation = angle_rotation
+        self.frames = deque(maxlen=buffer_size)
+        self.condition = Condition()
+        self.capture_thread = None
+        self.preview_key = None
+        self.preview_matrix = None
+        self.preview_bgr = None
+        self.preview_rgb = None
+        self.preview_surface = None
+        self.preview_frames = 0
+        self.preview_allocations = 0
+        self.preview_started = None
 
-    
-    def get_image(self, width = 320, height = 240):
+    def start(self):
+        if self.is_streaming():
+            return
         if not self.camera.isOpened():
             self.camera.open(self.cam_number)
-            
-        success, image = self.camera.read()
-        image = cv2.cvtColor(image, cv2.COLOR_BGR2RGB)
-        image = imutils.rotate(image, self.angle_rotation)
-        image = imutils.resize(image, width=width)
-        buffer = None
-        
+        self.capture_thread = CaptureThread(self)
+        self.capture_thread.start()
+
+    def stop(self):
+        if self.preview_allocations:
+            logging.info(f'|Webcam|CAMERA[{self.cam_number}]:PREVIEW[{self.preview_stats()}]')
+        if self.capture_thread is not None:
+            self.capture_thread.stop()
+            self.capture_thread.join(timeout=1)
+            self.capture_thread = None
+        with self.condition:
+            self.frames.clear()
+        self.camera.release()
+
+    def is_streaming(self):
+        return self.capture_thread is not None and self.capture_thread.is_alive()
+
+    def push_frame(self, frame):
+        with self.condition:
+            self.frames.append((time.time(), frame))
+            self.condition.notify_all()
+
+    def latest_frame(self, newer_than = None, timeout = 1.0):
+        with self.condition:
+            if newer_than is not None:
+                self.condition.wait_for(lambda: len(self.frames) > 0 and self.frames[-1][0] > newer_than, timeout)
+            if len(self.frames) == 0:
+                return None, None
+            return self.frames[-1]
+
+    def read_frame(self, delay = 0, newer_than = None):
+        if self.is_streaming():
+            timestamp, frame = self.latest_frame(newer_than)
+            return frame is not None, frame
+
+        if not self.camera.isOpened():
+            self.camera.open(self.cam_number)
+
+        for i in range(delay):
+            temp = self.camera.read()
+        return self.camera.read()
+    
+    def get_image(self, width = 320, height = 240):
+        success, image = self.read_frame()
+
         if success:
-            buffer = pygame.image.frombuffer(image.tostring(), image.shape[1::-1], "RGB")
+            self.allocate_preview(image.shape, width)
+            cv2.warpAffine(image, self.preview_matrix, self.preview_key[2:], dst=self.preview_bgr)
+            cv2.cvtColor(self.preview_bgr, cv2.COLOR_BGR2RGB, dst=self.preview_rgb)
+            self.preview_frames += 1
+        elif self.preview_surface is None:
+            self.allocate_preview((height, width), width)
 
-        return buffer
+        return self.preview_surface
+
+    def allocate_preview(self, shape, width):
+        height = int(shape[0] * width / shape[1])
+        key = (shape[0], shape[1], width, height)
+        if key == self.preview_key:
+            return
+
+        center = (shape[1] / 2, shape[0] / 2)
+        matrix = cv2.getRotationMatrix2D(center, self.angle_rotation, width / shape[1])
+        matrix[0, 2] += width / 2 - center[0]
+        matrix[1, 2] += height / 2 - center[1]
+
+        self.preview_key = key
+        self.preview_matrix = matrix
+        self.preview_bgr = np.zeros((height, width, 3), dtype=np.uint8)
+        self.preview_rgb = np.zeros((height, width, 3), dtype=np.uint8)
+        self.preview_surface = pygame.image.frombuffer(self.preview_rgb, (width, height), 'RGB')
+        self.preview_allocations += 1
+        self.preview_started = time.time()
+        self.preview_frames = 0
+
+    def preview_stats(self):
+        elapsed = time.time() - self.preview_started if self.preview_started else 0
+        return {
+            'frames': self.preview_frames,
+            'allocations': self.preview_allocations,
+            'fps': self.preview_frames / elapsed if elapsed else 0
+        }
+
+    def latest_frames(self, count, newer_than = None, timeout = 1.0):
+        count = min(count, self.frames.maxlen)
+        with self.condition:
+            if newer_than is not None:
+                self.condition.wait_for(lambda: sum(1 for timestamp, frame in self.frames if timestamp > newer_than) >= count, timeout)
+                frames = [frame for timestamp, frame in self.frames if timestamp > newer_than]
+                if len(frames) > 0:
+                    return frames[-count:]
+            return [frame for timestamp, frame in list(self.frames)[-count:]]
+
+    def read_frames(self, count, delay = 0, newer_than = None):
+        if self.is_streaming():
+            return self.latest_frames(count, newer_than)
 
-    def take_picture(self, delay=30, width=640, height=480, process=True):
         if not self.camera.isOpened():
             self.camera.open(self.cam_number)
-            
+
         for i in range(delay):
             temp = self.camera.read()
-        success, image = self.camera.read()
+        frames = []
+        for i in range(count):
+            success, frame = self.camera.read()
+            if success:
+                frames.append(frame)
+        return frames
+
+    def prepare_picture(self, image, width = 640, process = True, roi = None):
         image = imutils.rotate(image, self.angle_rotation)
         image = imutils.resize(image, width=width)
-        cv2.imwrite(f'temp/color-cam-{self.cam_number}.jpg', image)
-        
+        DebugWriter.write(f'color-cam-{self.cam_number}', image)
+
+        if roi is not None:
+            x, y, w, h = roi
+            image = image[y:y+h, x:x+w]
+
         if not process:
-            self.release()
             return image
 
+        erode = self.process_image(image)
+        DebugWriter.write('black', erode)
+        return erode
+
+    def take_picture(self, delay=30, width=640, height=480, process=True, newer_than=None, roi=None):
+        if newer_than is None:
+            newer_than = time.time()
+
+        success, image = self.read_frame(delay, newer_than)
+        image = self.prepare_picture(image, width, process, roi)
+        self.release()
+        return image
+
+    def take_pictures(self, count, delay=1, width=640, height=480, process=True, newer_than=None, roi=None):
+        if newer_than is None:
+            newer_than = time.time()
+
+        frames = self.read_frames(count, delay, newer_than)
+        images = [self.prepare_picture(frame, width, process, roi) for frame in frames]
+        self.release()
+        return images
+
+    @staticmethod
+    def process_image(image):
         gray = cv2.cvtColor(image, cv2.COLOR_BGR2GRAY)
         blurred = cv2.GaussianBlur(gray, (3, 3), cv2.BORDER_DEFAULT)
         edged = cv2.Canny(blurred, 100, 200, 5)
         thresh = cv2.adaptiveThreshold(edged, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, cv2.THRESH_BINARY, 11, 25)
-        erode = cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, np.array((3, 3)))
-
-        self.release()
-        cv2.imwrite('temp/black.jpg', erode)
-        return erode
+        return cv2.morphologyEx(thresh, cv2.MORPH_CLOSE, np.array((3, 3)))
     
     def release(self):
+        if self.is_streaming():
+            return
         self.camera.grab()
         self.camera.release()
\ No newline at end of file